@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AccommodationConfig(AppConfig):
     name = 'accommodation'
+
+    def ready(self):
+        from . import signals
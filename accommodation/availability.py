@@ -0,0 +1,53 @@
+from django.db.models   import Exists, OuterRef
+
+from reservation.models import Reservation
+from .models            import UnavailableDate
+from .intervals         import coalesce_ranges
+
+HORIZON_DAYS    = 730
+STATUS_PENDING  = 1
+STATUS_BOOKED   = 2
+STATUS_CANCELED = 3
+
+BLOCKING_STATUSES = (STATUS_PENDING, STATUS_BOOKED)
+
+def get_blocked_days(accommodation_id, start, end):
+    unavailable_dates = UnavailableDate.objects.filter(
+        accommodation_id = accommodation_id,
+        start_date__lt   = end,
+        end_date__gt     = start
+    ).values_list('start_date', 'end_date')
+    reservations      = Reservation.objects.filter(
+        accommodation_id = accommodation_id,
+        status_id__in    = BLOCKING_STATUSES,
+        start_date__lt   = end,
+        end_date__gt     = start
+    ).values_list('start_date', 'end_date')
+
+    blocked_days = []
+    cursor       = start
+    for start_date, end_date in coalesce_ranges(unavailable_dates.union(reservations, all=True)):
+        start_date = max(start_date, cursor)
+        end_date   = min(end_date, end)
+
+        blocked_days.append('0' * (start_date - cursor).days + '1' * (end_date - start_date).days)
+        cursor = end_date
+
+    blocked_days.append('0' * (end - cursor).days)
+
+    return ''.join(blocked_days)
+
+def get_availability_condition(checkin, checkout):
+    overlapping_dates = UnavailableDate.objects.filter(
+        accommodation  = OuterRef('pk'),
+        start_date__lt = checkout,
+        end_date__gt   = checkin
+    )
+    overlapping_reservations = Reservation.objects.filter(
+        accommodation  = OuterRef('pk'),
+        status_id__in  = BLOCKING_STATUSES,
+        start_date__lt = checkout,
+        end_date__gt   = checkin
+    )
+
+    return ~Exists(overlapping_dates) & ~Exists(overlapping_reservations)
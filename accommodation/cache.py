@@ -0,0 +1,33 @@
+import json
+import time
+import hashlib
+
+from django.core.cache  import caches
+
+from .models            import SearchVersion
+
+SEARCH_VERSION_ID = 1
+SEARCH_PARAMS     = [
+    'checkin', 'checkout', 'guests', 'min', 'max', 'price_mode', 'sort', 'q', 'limit', 'offset', 'cursor', 'count',
+    'sw_lat', 'sw_lng', 'ne_lat', 'ne_lng', 'lat', 'lng', 'radius'
+]
+
+search_cache = caches['search']
+
+def get_search_version():
+    return SearchVersion.objects.filter(id=SEARCH_VERSION_ID).values_list('version', flat=True).first() or 0
+
+def bump_search_version():
+    version = time.time_ns()
+
+    if not SearchVersion.objects.filter(id=SEARCH_VERSION_ID).update(version=version):
+        SearchVersion.objects.get_or_create(id=SEARCH_VERSION_ID, defaults={'version': version})
+
+def get_search_cache_key(query_params, prefix='search', skip=()):
+    params = {key: query_params[key] for key in SEARCH_PARAMS if query_params.get(key) and key not in skip}
+    if 'roomtype' not in skip:
+        params['roomtype'] = sorted(set(query_params.getlist('roomtype')))
+
+    digest = hashlib.md5(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    return f'{prefix}:{get_search_version()}:{digest}'
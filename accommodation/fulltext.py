@@ -0,0 +1,69 @@
+import re
+
+from collections      import Counter
+
+from django.db.models import Count, Sum, OuterRef, Subquery
+
+from .models          import SearchTerm
+
+WORD_PATTERN    = re.compile(r'\w+')
+HANGUL_PATTERN  = re.compile('[가-힣]')
+MAX_TERM_LENGTH = 50
+FIELD_WEIGHTS   = {
+    'title'      : 3,
+    'address'    : 2,
+    'description': 1
+}
+
+def tokenize(text):
+    terms = []
+    for word in WORD_PATTERN.findall(text.lower()):
+        if HANGUL_PATTERN.search(word):
+            terms += list(word)
+            terms += [word[index:index + 2] for index in range(len(word) - 1)]
+        else:
+            terms.append(word[:MAX_TERM_LENGTH])
+
+    return terms
+
+def tokenize_query(text):
+    terms = []
+    for word in WORD_PATTERN.findall(text.lower()):
+        if HANGUL_PATTERN.search(word) and len(word) > 1:
+            terms += [word[index:index + 2] for index in range(len(word) - 1)]
+        else:
+            terms.append(word[:MAX_TERM_LENGTH])
+
+    return terms
+
+def get_term_weights(accommodation):
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(getattr(accommodation, field)):
+            weights[term] += weight
+
+    return weights
+
+def index_accommodations(accommodations):
+    SearchTerm.objects.filter(accommodation_id__in=[accommodation.id for accommodation in accommodations]).delete()
+    SearchTerm.objects.bulk_create([
+        SearchTerm(accommodation_id=accommodation.id, term=term, weight=weight)
+        for accommodation in accommodations for term, weight in get_term_weights(accommodation).items()
+    ], batch_size=1000)
+
+def index_accommodation(accommodation):
+    index_accommodations([accommodation])
+
+def search_accommodations(queryset, query):
+    terms = set(tokenize_query(query))
+    if not terms:
+        return queryset.none()
+
+    matches = SearchTerm.objects.filter(term__in=terms).values('accommodation_id').annotate(
+        matched_terms = Count('term'),
+        relevance     = Sum('weight')
+    ).filter(matched_terms=len(terms)).order_by()
+
+    return queryset.filter(id__in=matches.values('accommodation_id')).annotate(
+        relevance = Subquery(matches.filter(accommodation_id=OuterRef('pk')).values('relevance'))
+    )
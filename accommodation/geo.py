@@ -0,0 +1,75 @@
+import math
+
+BASE32            = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 12
+MAX_COVER_CELLS   = 32
+KM_PER_LAT_DEGREE = 110.574
+KM_PER_LNG_DEGREE = 111.320
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    latitude  = float(latitude)
+    longitude = float(longitude)
+
+    geohash, bits, bit_count, even = [], 0, 0, True
+    while len(geohash) < precision:
+        value_range = lng_range if even else lat_range
+        value       = longitude if even else latitude
+        middle      = (value_range[0] + value_range[1]) / 2
+
+        bits <<= 1
+        if value >= middle:
+            bits          |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+
+        even       = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(BASE32[bits])
+            bits, bit_count = 0, 0
+
+    return ''.join(geohash)
+
+def get_cell_size(precision):
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+def cover_bounding_box(sw_lat, sw_lng, ne_lat, ne_lng):
+    if sw_lng > ne_lng:
+        return cover_bounding_box(sw_lat, sw_lng, ne_lat, 180.0) | cover_bounding_box(sw_lat, -180.0, ne_lat, ne_lng)
+
+    prefixes = {''}
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        cell_height, cell_width = get_cell_size(precision)
+        rows    = math.floor(ne_lat / cell_height) - math.floor(sw_lat / cell_height) + 1
+        columns = math.floor(ne_lng / cell_width) - math.floor(sw_lng / cell_width) + 1
+
+        if rows * columns > MAX_COVER_CELLS:
+            break
+
+        prefixes = {
+            encode_geohash(
+                min(sw_lat + row * cell_height, ne_lat),
+                min(sw_lng + column * cell_width, ne_lng),
+                precision
+            )
+            for row in range(rows) for column in range(columns)
+        }
+
+    return prefixes
+
+def get_radius_bounding_box(latitude, longitude, radius):
+    lat_delta = radius / KM_PER_LAT_DEGREE
+    lng_delta = radius / (KM_PER_LNG_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+
+    return (
+        max(latitude - lat_delta, -90.0),
+        (longitude - lng_delta + 180.0) % 360.0 - 180.0 if lng_delta < 180.0 else -180.0,
+        min(latitude + lat_delta, 90.0),
+        (longitude + lng_delta + 180.0) % 360.0 - 180.0 if lng_delta < 180.0 else 180.0,
+    )
@@ -0,0 +1,9 @@
+def coalesce_ranges(ranges):
+    merged = []
+    for start_date, end_date in sorted(ranges):
+        if merged and start_date <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end_date))
+        else:
+            merged.append((start_date, end_date))
+
+    return merged
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db                   import transaction
+from django.db.models            import Count
+
+from accommodation.models        import UnavailableDate
+from accommodation.intervals     import coalesce_ranges
+
+class Command(BaseCommand):
+    help = 'Merge overlapping and adjacent unavailable date ranges of every accommodation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows would be removed')
+
+    def handle(self, *args, **options):
+        accommodation_ids = UnavailableDate.objects.values('accommodation_id').annotate(
+            range_count = Count('id')
+        ).filter(range_count__gt=1).values_list('accommodation_id', flat=True)
+
+        removed_rows   = 0
+        accommodations = 0
+        for accommodation_id in accommodation_ids.iterator():
+            with transaction.atomic():
+                blocked_ranges = list(
+                    UnavailableDate.objects.select_for_update().filter(accommodation_id=accommodation_id).order_by('start_date', 'id')
+                )
+                merged_ranges  = coalesce_ranges([(blocked.start_date, blocked.end_date) for blocked in blocked_ranges])
+
+                if len(merged_ranges) == len(blocked_ranges):
+                    continue
+
+                removed_rows   += len(blocked_ranges) - len(merged_ranges)
+                accommodations += 1
+
+                if options['dry_run']:
+                    continue
+
+                kept_ranges = blocked_ranges[:len(merged_ranges)]
+                for blocked, (start_date, end_date) in zip(kept_ranges, merged_ranges):
+                    blocked.start_date = start_date
+                    blocked.end_date   = end_date
+
+                UnavailableDate.objects.bulk_update(kept_ranges, ['start_date', 'end_date'])
+                UnavailableDate.objects.filter(id__in=[blocked.id for blocked in blocked_ranges[len(merged_ranges):]]).delete()
+
+        verb = 'would be removed' if options['dry_run'] else 'removed'
+        self.stdout.write(self.style.SUCCESS(f'{removed_rows} unavailable date rows {verb} across {accommodations} accommodations'))
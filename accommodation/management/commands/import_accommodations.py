@@ -0,0 +1,205 @@
+import os
+import csv
+import json
+import time
+
+from datetime                    import datetime
+from decimal                     import Decimal, InvalidOperation
+from itertools                   import islice
+from multiprocessing             import Pool
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db                   import transaction
+
+from user.models                 import User
+from accommodation.models        import Accommodation, Category, Image, UnavailableDate, ImportCheckpoint
+from accommodation.cache         import bump_search_version
+from accommodation.fulltext      import index_accommodations
+from accommodation.intervals     import coalesce_ranges
+from accommodation.signals       import muted_listing_signals
+
+REQUIRED_KEYS = [
+    'roomType', 'title', 'address', 'lat', 'long', 'description', 'maxPeople',
+    'onedayPrice', 'cleaningFee', 'beds', 'bedrooms', 'bathrooms'
+]
+
+def read_records(path, file_format):
+    with open(path, newline='', encoding='utf-8') as file:
+        if file_format == 'csv':
+            for row in csv.DictReader(file):
+                row['imgUrls']          = [url for url in row.get('imgUrls', '').split('|') if url]
+                row['unavailableDates'] = [
+                    dict(zip(['start_date', 'end_date'], dates.split('~')))
+                    for dates in row.get('unavailableDates', '').split('|') if dates
+                ]
+                yield row
+        else:
+            for line in file:
+                if line.strip():
+                    yield line
+
+def parse_record(record):
+    try:
+        if isinstance(record, str):
+            record = json.loads(record)
+
+        return {
+            'user_id'            : int(record['userId']) if record.get('userId') else None,
+            'category_name'      : record['roomType'],
+            'title'              : record['title'],
+            'address'            : record['address'],
+            'latitude'           : Decimal(str(record['lat'])),
+            'longitude'          : Decimal(str(record['long'])),
+            'description'        : record['description'],
+            'max_capacity'       : int(record['maxPeople']),
+            'price'              : Decimal(str(record['onedayPrice'])),
+            'cleaning_fee'       : Decimal(str(record['cleaningFee'])),
+            'number_of_bed'      : int(record['beds']),
+            'number_of_bedroom'  : int(record['bedrooms']),
+            'number_of_bathroom' : int(record['bathrooms']),
+            'image_urls'         : list(record.get('imgUrls', [])),
+            'unavailable_dates'  : coalesce_ranges([(
+                datetime.strptime(unavailable_date['start_date'], '%Y-%m-%d').date(),
+                datetime.strptime(unavailable_date['end_date'], '%Y-%m-%d').date()
+            ) for unavailable_date in record.get('unavailableDates', [])])
+        }, None
+
+    except KeyError as error:
+        return None, f'KEY_ERROR {error}'
+
+    except (ValueError, TypeError, InvalidOperation) as error:
+        return None, f'INVALID_VALUE {error}'
+
+class Command(BaseCommand):
+    help = 'Stream accommodations from an NDJSON or CSV file into the database in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['ndjson', 'csv'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--user-id', type=int, help='Host of records without a userId')
+        parser.add_argument('--workers', type=int, default=1, help='Processes used to parse and validate records')
+        parser.add_argument('--checkpoint', help='Checkpoint name, defaults to the absolute path of the file')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+
+    def handle(self, *args, **options):
+        path            = options['path']
+        file_format     = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+        batch_size      = options['batch_size']
+        checkpoint_name = options['checkpoint'] or os.path.abspath(path)
+
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist')
+
+        if batch_size <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        checkpoint = ImportCheckpoint.objects.get_or_create(source=checkpoint_name)[0]
+        if options['restart']:
+            checkpoint.position = 0
+
+        position = checkpoint.position
+        records  = islice(read_records(path, file_format), position, None)
+
+        self.categories = {category.name: category.id for category in Category.objects.all()}
+        self.user_id    = options['user_id']
+
+        if self.user_id and not User.objects.filter(id=self.user_id).exists():
+            raise CommandError(f'User {self.user_id} does not exist')
+
+        pool       = Pool(options['workers']) if options['workers'] > 1 else None
+        started_at = time.monotonic()
+        imported   = 0
+        rejected   = 0
+
+        if position:
+            self.stdout.write(f'Resuming after record {position}')
+
+        try:
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+
+                results  = pool.map(parse_record, batch) if pool else [parse_record(record) for record in batch]
+                host_ids = set(User.objects.filter(
+                    id__in = {row['user_id'] for row, error in results if row and row['user_id']}
+                ).values_list('id', flat=True))
+
+                rows = []
+                for index, (row, error) in enumerate(results, start=position + 1):
+                    error = error or self.validate(row, host_ids)
+                    if error:
+                        rejected += 1
+                        self.stderr.write(f'Record {index} rejected: {error}')
+                    else:
+                        rows.append(row)
+
+                position += len(batch)
+
+                with transaction.atomic(), muted_listing_signals():
+                    self.insert(rows)
+
+                    checkpoint.position = position
+                    checkpoint.save()
+
+                imported += len(rows)
+
+                elapsed = time.monotonic() - started_at
+                rate    = imported / elapsed if elapsed else 0
+                self.stdout.write(f'{position} records read, {imported} imported, {rejected} rejected ({rate:.1f} rows/sec)')
+
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        if imported:
+            bump_search_version()
+
+        self.stdout.write(self.style.SUCCESS(f'{imported} accommodations imported, {rejected} rejected'))
+
+    def validate(self, row, host_ids):
+        if row['category_name'] not in self.categories:
+            return f'CATEGORY_DOES_NOT_EXIST {row["category_name"]}'
+
+        if not (row['user_id'] or self.user_id):
+            return 'USER_REQUIRED'
+
+        if row['user_id'] and row['user_id'] not in host_ids:
+            return f'USER_DOES_NOT_EXIST {row["user_id"]}'
+
+        return None
+
+    def insert(self, rows):
+        accommodations = [Accommodation(
+            category_id        = self.categories[row['category_name']],
+            user_id            = row['user_id'] or self.user_id,
+            title              = row['title'],
+            address            = row['address'],
+            latitude           = row['latitude'],
+            longitude          = row['longitude'],
+            description        = row['description'],
+            max_capacity       = row['max_capacity'],
+            price              = row['price'],
+            cleaning_fee       = row['cleaning_fee'],
+            number_of_bed      = row['number_of_bed'],
+            number_of_bedroom  = row['number_of_bedroom'],
+            number_of_bathroom = row['number_of_bathroom'],
+            cover_image_url    = row['image_urls'][0] if row['image_urls'] else ''
+        ) for row in rows]
+
+        for accommodation in accommodations:
+            accommodation.save()
+
+        Image.objects.bulk_create([
+            Image(accommodation=accommodation, image_url=image_url, position=position, is_cover=position == 0)
+            for accommodation, row in zip(accommodations, rows) for position, image_url in enumerate(row['image_urls'])
+        ], batch_size=1000)
+
+        UnavailableDate.objects.bulk_create([
+            UnavailableDate(accommodation=accommodation, start_date=start_date, end_date=end_date)
+            for accommodation, row in zip(accommodations, rows) for start_date, end_date in row['unavailable_dates']
+        ], batch_size=1000)
+
+        index_accommodations(accommodations)
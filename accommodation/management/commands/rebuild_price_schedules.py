@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from accommodation.models        import Accommodation
+from accommodation.pricing       import rebuild_price_schedule
+
+class Command(BaseCommand):
+    help = 'Recompile price schedules so that every listing with price overrides covers the rolling horizon from today'
+
+    def handle(self, *args, **options):
+        accommodations = Accommodation.objects.filter(
+            priceoverride__isnull = False
+        ).distinct().values_list('id', 'price').iterator()
+
+        count = 0
+        for accommodation_id, price in accommodations:
+            rebuild_price_schedule(accommodation_id, price)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{count} price schedules rebuilt'))
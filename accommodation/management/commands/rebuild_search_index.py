@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db                   import transaction
+
+from accommodation.models        import Accommodation
+from accommodation.fulltext      import index_accommodation
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search terms of every accommodation'
+
+    def handle(self, *args, **options):
+        count = 0
+        for accommodation in Accommodation.objects.only('id', 'title', 'address', 'description').iterator():
+            with transaction.atomic():
+                index_accommodation(accommodation)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{count} accommodations indexed'))
@@ -0,0 +1,26 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Availability',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin', models.DateField()),
+                ('bitmap', models.BinaryField()),
+                ('accommodation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='availability', to='accommodation.accommodation')),
+            ],
+            options={
+                'db_table': 'availabilities',
+            },
+        ),
+    ]
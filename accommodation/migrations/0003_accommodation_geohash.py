@@ -0,0 +1,29 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:01
+
+from django.db import migrations, models
+
+from accommodation.geo import encode_geohash
+
+def fill_geohash(apps, schema_editor):
+    Accommodation  = apps.get_model('accommodation', 'Accommodation')
+    accommodations = list(Accommodation.objects.only('id', 'latitude', 'longitude'))
+
+    for accommodation in accommodations:
+        accommodation.geohash = encode_geohash(accommodation.latitude, accommodation.longitude)
+
+    Accommodation.objects.bulk_update(accommodations, ['geohash'], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation', '0002_availability'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accommodation',
+            name='geohash',
+            field=models.CharField(db_index=True, default='', max_length=12),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from accommodation.fulltext import get_term_weights
+
+def build_search_terms(apps, schema_editor):
+    Accommodation = apps.get_model('accommodation', 'Accommodation')
+    SearchTerm    = apps.get_model('accommodation', 'SearchTerm')
+
+    for accommodation in Accommodation.objects.only('id', 'title', 'address', 'description').iterator():
+        SearchTerm.objects.bulk_create([
+            SearchTerm(accommodation_id=accommodation.id, term=term, weight=weight)
+            for term, weight in get_term_weights(accommodation).items()
+        ], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation', '0003_accommodation_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('weight', models.IntegerField()),
+                ('accommodation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accommodation.accommodation')),
+            ],
+            options={
+                'db_table': 'search_terms',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term', 'accommodation'], name='search_term_term_033f54_idx'),
+        ),
+        migrations.RunPython(build_search_terms, migrations.RunPython.noop),
+    ]
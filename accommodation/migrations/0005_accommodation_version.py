@@ -0,0 +1,18 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation', '0004_searchterm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accommodation',
+            name='version',
+            field=models.IntegerField(default=1),
+        ),
+    ]
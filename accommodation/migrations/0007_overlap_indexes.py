@@ -0,0 +1,17 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation', '0006_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='unavailabledate',
+            index=models.Index(fields=['accommodation', 'start_date', 'end_date'], name='unavailable_accommo_ebfe59_idx'),
+        ),
+    ]
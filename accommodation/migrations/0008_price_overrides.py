@@ -0,0 +1,43 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation', '0007_overlap_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceSchedule',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin', models.DateField()),
+                ('prefix_sums', models.BinaryField()),
+                ('accommodation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='price_schedule', to='accommodation.accommodation')),
+            ],
+            options={
+                'db_table': 'price_schedules',
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceOverride',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('accommodation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accommodation.accommodation')),
+            ],
+            options={
+                'db_table': 'price_overrides',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='priceoverride',
+            index=models.Index(fields=['accommodation', 'start_date', 'end_date'], name='price_overr_accommo_f5111b_idx'),
+        ),
+    ]
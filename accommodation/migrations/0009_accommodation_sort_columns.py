@@ -0,0 +1,50 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:15
+
+from statistics import mean
+
+from django.db import migrations, models
+
+RATE_FIELDS = ['clean_rate', 'accuracy_rate', 'communication_rate', 'location_rate', 'checkin_rate', 'value_rate']
+
+def fill_sort_columns(apps, schema_editor):
+    Accommodation              = apps.get_model('accommodation', 'Accommodation')
+    AccommodationRatingSummary = apps.get_model('review', 'AccommodationRatingSummary')
+
+    for summary in AccommodationRatingSummary.objects.filter(review_count__gt=0):
+        Accommodation.objects.filter(id=summary.accommodation_id).update(
+            rating       = round(mean(getattr(summary, f'{field}_sum') / summary.review_count for field in RATE_FIELDS), 2),
+            review_count = summary.review_count
+        )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation', '0008_price_overrides'),
+        ('review', '0003_review_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accommodation',
+            name='rating',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='accommodation',
+            name='review_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='accommodation',
+            index=models.Index(fields=['price', 'id'], name='accommodati_price_22fc73_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accommodation',
+            index=models.Index(fields=['rating', 'id'], name='accommodati_rating_83a87f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accommodation',
+            index=models.Index(fields=['review_count', 'id'], name='accommodati_review__2e678b_idx'),
+        ),
+        migrations.RunPython(fill_sort_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+def fill_image_positions(apps, schema_editor):
+    Accommodation = apps.get_model('accommodation', 'Accommodation')
+    Image         = apps.get_model('accommodation', 'Image')
+
+    images    = list(Image.objects.order_by('accommodation_id', 'id'))
+    positions = {}
+
+    for image in images:
+        image.position                    = positions.get(image.accommodation_id, 0)
+        image.is_cover                    = image.position == 0
+        positions[image.accommodation_id] = image.position + 1
+
+        if image.is_cover:
+            Accommodation.objects.filter(id=image.accommodation_id).update(cover_image_url=image.image_url)
+
+    Image.objects.bulk_update(images, ['position', 'is_cover'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation', '0009_accommodation_sort_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accommodation',
+            name='cover_image_url',
+            field=models.URLField(default='', max_length=2000),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='is_cover',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['accommodation', '-is_cover', 'position', 'id'], name='images_accommo_1123ae_idx'),
+        ),
+        migrations.RunPython(fill_image_positions, migrations.RunPython.noop),
+    ]
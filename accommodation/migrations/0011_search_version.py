@@ -0,0 +1,28 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:31
+
+from django.db import migrations, models
+
+def create_search_version(apps, schema_editor):
+    SearchVersion = apps.get_model('accommodation', 'SearchVersion')
+    SearchVersion.objects.create(id=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation', '0010_image_position_cover'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'search_versions',
+            },
+        ),
+        migrations.RunPython(create_search_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation', '0011_search_version'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='Availability',
+        ),
+    ]
@@ -1,11 +1,26 @@
-from django.db   import models
+from django.db   import models, connection
 
 from user.models    import User
+from .geo           import encode_geohash
+
+class CategoryManager(models.Manager):
+    cached_categories = {}
+
+    def get_by_name(self, name):
+        if name not in self.cached_categories:
+            self.cached_categories[name] = self.get(name=name)
+
+        return self.cached_categories[name]
+
+    def clear_cache(self):
+        self.cached_categories.clear()
 
 class Category(models.Model):
     name        = models.CharField(max_length=20)
     description = models.CharField(max_length=100)
 
+    objects = CategoryManager()
+
     class Meta:
         db_table = 'categories'
 
@@ -23,16 +38,69 @@ class Accommodation(models.Model):
     number_of_bed      = models.IntegerField()
     number_of_bedroom  = models.IntegerField()
     number_of_bathroom = models.IntegerField()
+    geohash            = models.CharField(max_length=12, db_index=True, default='')
+    version            = models.IntegerField(default=1)
+    rating             = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    review_count       = models.IntegerField(default=0)
+    cover_image_url    = models.URLField(max_length=2000, default='')
 
     class Meta:
         db_table = 'accommodations'
+        indexes  = [
+            models.Index(fields=['price', 'id']),
+            models.Index(fields=['rating', 'id']),
+            models.Index(fields=['review_count', 'id']),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.geohash = encode_geohash(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
+IMAGE_ORDERING = ['-is_cover', 'position', 'id']
+
+class ImageManager(models.Manager):
+    def get_cover_url(self, accommodation_id):
+        return self.filter(accommodation_id=accommodation_id).order_by(*IMAGE_ORDERING).values_list('image_url', flat=True).first() or ''
+
+    def get_galleries(self, accommodation_ids, limit):
+        galleries = {accommodation_id: [] for accommodation_id in accommodation_ids}
+
+        if not galleries:
+            return galleries
+
+        if not connection.features.supports_over_clause:
+            for accommodation_id, image_url in self.filter(accommodation_id__in=galleries).order_by('accommodation_id', *IMAGE_ORDERING).values_list('accommodation_id', 'image_url'):
+                if len(galleries[accommodation_id]) < limit:
+                    galleries[accommodation_id].append(image_url)
+
+            return galleries
+
+        placeholders = ', '.join(['%s'] * len(galleries))
+        images       = self.raw(
+            f'SELECT id, accommodation_id, image_url FROM ('
+            f'SELECT id, accommodation_id, image_url, ROW_NUMBER() OVER ('
+            f'PARTITION BY accommodation_id ORDER BY is_cover DESC, position, id'
+            f') AS image_rank FROM images WHERE accommodation_id IN ({placeholders})'
+            f') ranked_images WHERE image_rank <= %s ORDER BY accommodation_id, image_rank',
+            [*galleries, limit]
+        )
+
+        for image in images:
+            galleries[image.accommodation_id].append(image.image_url)
+
+        return galleries
 
 class Image(models.Model):
     accommodation = models.ForeignKey('Accommodation', on_delete=models.CASCADE)
     image_url     = models.URLField(max_length=2000)
+    position      = models.PositiveIntegerField(default=0)
+    is_cover      = models.BooleanField(default=False)
+
+    objects = ImageManager()
 
     class Meta:
         db_table = 'images'
+        indexes  = [models.Index(fields=['accommodation', '-is_cover', 'position', 'id'])]
 
 class UnavailableDate(models.Model):
     accommodation = models.ForeignKey('Accommodation', on_delete=models.CASCADE)
@@ -41,3 +109,45 @@ class UnavailableDate(models.Model):
 
     class Meta:
         db_table = 'unavailable_dates'
+        indexes  = [models.Index(fields=['accommodation', 'start_date', 'end_date'])]
+
+class PriceOverride(models.Model):
+    accommodation = models.ForeignKey('Accommodation', on_delete=models.CASCADE)
+    start_date    = models.DateField()
+    end_date      = models.DateField()
+    price         = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        db_table = 'price_overrides'
+        indexes  = [models.Index(fields=['accommodation', 'start_date', 'end_date'])]
+
+class PriceSchedule(models.Model):
+    accommodation = models.OneToOneField('Accommodation', on_delete=models.CASCADE, related_name='price_schedule')
+    origin        = models.DateField()
+    prefix_sums   = models.BinaryField()
+
+    class Meta:
+        db_table = 'price_schedules'
+
+class SearchTerm(models.Model):
+    accommodation = models.ForeignKey('Accommodation', on_delete=models.CASCADE)
+    term          = models.CharField(max_length=50)
+    weight        = models.IntegerField()
+
+    class Meta:
+        db_table = 'search_terms'
+        indexes  = [models.Index(fields=['term', 'accommodation'])]
+
+class SearchVersion(models.Model):
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'search_versions'
+
+class ImportCheckpoint(models.Model):
+    source     = models.CharField(max_length=255, unique=True)
+    position   = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'import_checkpoints'
@@ -0,0 +1,98 @@
+import json
+import base64
+import hashlib
+import binascii
+
+from datetime                     import datetime
+
+from django.core.cache            import cache
+from django.core.exceptions       import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db                    import connection
+from django.db.models             import Q
+
+ESTIMATED_COUNT_TIMEOUT = 60 * 5
+
+class CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+
+        return super().default(o)
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, cls=CursorEncoder).encode()).decode()
+
+def decode_cursor(cursor, fields):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('INVALID_CURSOR')
+
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise ValueError('INVALID_CURSOR')
+
+    try:
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValidationError, TypeError):
+        raise ValueError('INVALID_CURSOR')
+
+def get_sort_model_field(queryset, field_name):
+    if field_name in queryset.query.annotations:
+        return queryset.query.annotations[field_name].output_field
+
+    return queryset.model._meta.get_field(field_name)
+
+def get_ordering(sort_field):
+    if sort_field.lstrip('-') == 'id':
+        return [sort_field]
+
+    return [sort_field, '-id' if sort_field.startswith('-') else 'id']
+
+def paginate_by_cursor(queryset, cursor, limit, sort_field='id'):
+    descending = sort_field.startswith('-')
+    field_name = sort_field.lstrip('-')
+    lookup     = 'lt' if descending else 'gt'
+
+    queryset = queryset.order_by(*get_ordering(sort_field))
+
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, [get_sort_model_field(queryset, field_name), queryset.model._meta.pk])
+        queryset = queryset.filter(
+            Q(**{f'{field_name}__{lookup}': sort_value}) |
+            Q(**{field_name: sort_value, f'id__{lookup}': last_id})
+        )
+
+    rows = list(queryset[:limit + 1])
+    page = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit and page:
+        last_row    = page[-1]
+        next_cursor = encode_cursor([getattr(last_row, field_name), last_row.id])
+
+    return page, next_cursor
+
+def explain_row_count(queryset):
+    sql, params = queryset.values('id').query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN {sql}', params)
+        columns = [column[0] for column in cursor.description]
+        plan    = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    estimate = 1
+    for step in plan:
+        if step['id'] == plan[0]['id'] and step['rows']:
+            estimate *= step['rows'] * (step.get('filtered') or 100) / 100
+
+    return round(estimate)
+
+def get_estimated_count(queryset):
+    sql, params = queryset.query.sql_with_params()
+    cache_key   = 'estimated-count:' + hashlib.md5(f'{sql}{params}'.encode()).hexdigest()
+
+    if connection.vendor != 'mysql':
+        return cache.get_or_set(cache_key, queryset.count, ESTIMATED_COUNT_TIMEOUT)
+
+    return cache.get_or_set(cache_key, lambda: explain_row_count(queryset), ESTIMATED_COUNT_TIMEOUT)
@@ -0,0 +1,142 @@
+import struct
+
+from datetime                   import date
+from decimal                    import Decimal, InvalidOperation
+
+from django.db.models           import Q, F, Min, Max, OuterRef, Subquery, DecimalField, ExpressionWrapper
+from django.db.models.functions import Coalesce, Least, Greatest
+
+from .models                    import Accommodation, PriceOverride, PriceSchedule
+from .availability              import HORIZON_DAYS
+
+MAX_QUOTES   = 500
+PRICE_FORMAT = struct.Struct('<q')
+
+def to_cents(price):
+    return int(price * 100)
+
+def compile_prefix_sums(origin, price, overrides):
+    nightly_prices = [to_cents(price)] * HORIZON_DAYS
+    for start_date, end_date, override_price in overrides:
+        first = max((start_date - origin).days, 0)
+        last  = min((end_date - origin).days, HORIZON_DAYS)
+
+        nightly_prices[first:last] = [to_cents(override_price)] * max(last - first, 0)
+
+    prefix_sums = [0]
+    for nightly_price in nightly_prices:
+        prefix_sums.append(prefix_sums[-1] + nightly_price)
+
+    return struct.pack(f'<{len(prefix_sums)}q', *prefix_sums)
+
+def get_prefix_sum(prefix_sums, offset):
+    return PRICE_FORMAT.unpack_from(prefix_sums, offset * PRICE_FORMAT.size)[0]
+
+def rebuild_price_schedule(accommodation_id, price):
+    overrides = list(
+        PriceOverride.objects.filter(accommodation_id=accommodation_id).order_by('id').values_list('start_date', 'end_date', 'price')
+    )
+
+    if not overrides:
+        PriceSchedule.objects.filter(accommodation_id=accommodation_id).delete()
+        return
+
+    origin      = date.today()
+    prefix_sums = compile_prefix_sums(origin, price, overrides)
+
+    if not PriceSchedule.objects.filter(accommodation_id=accommodation_id).update(origin=origin, prefix_sums=prefix_sums):
+        PriceSchedule.objects.create(accommodation_id=accommodation_id, origin=origin, prefix_sums=prefix_sums)
+
+def get_stay_total(price, cleaning_fee, checkin, checkout, origin=None, prefix_sums=None):
+    if origin is None:
+        return price * (checkout - checkin).days + cleaning_fee
+
+    first       = min(max((checkin - origin).days, 0), HORIZON_DAYS)
+    last        = min(max((checkout - origin).days, 0), HORIZON_DAYS)
+    prefix_sums = bytes(prefix_sums)
+
+    scheduled_total   = Decimal(get_prefix_sum(prefix_sums, last) - get_prefix_sum(prefix_sums, first)).scaleb(-2)
+    unscheduled_total = price * ((checkout - checkin).days - (last - first))
+
+    return scheduled_total + unscheduled_total + cleaning_fee
+
+def get_price_condition(price_min, price_max, field='price'):
+    condition = Q()
+    if price_min:
+        condition.add(Q(**{f'{field}__gt': price_min}), Q.AND)
+    if price_max:
+        condition.add(Q(**{f'{field}__lt': price_max}), Q.AND)
+
+    return condition
+
+def annotate_stay_bounds(queryset, checkin, checkout, total):
+    nights      = (checkout - checkin).days
+    overlapping = PriceOverride.objects.filter(
+        accommodation  = OuterRef('pk'),
+        start_date__lt = checkout,
+        end_date__gt   = checkin
+    ).order_by().values('accommodation')
+
+    bounds = {
+        'stay_low' : Least('price', Coalesce(Subquery(overlapping.annotate(low=Min('price')).values('low')), 'price')),
+        'stay_high': Greatest('price', Coalesce(Subquery(overlapping.annotate(high=Max('price')).values('high')), 'price'))
+    }
+
+    return queryset.annotate(**{
+        name: ExpressionWrapper(
+            bound * nights + F('cleaning_fee') if total else bound, output_field=DecimalField(max_digits=14, decimal_places=2)
+        ) for name, bound in bounds.items()
+    })
+
+def filter_by_price(queryset, price_min, price_max, checkin=None, checkout=None, total=False):
+    try:
+        price_min = Decimal(price_min) if price_min else None
+        price_max = Decimal(price_max) if price_max else None
+    except InvalidOperation:
+        raise ValueError('INVALID_PRICE')
+
+    if not (checkin and checkout) or checkin >= checkout:
+        return queryset.filter(get_price_condition(price_min, price_max))
+
+    nights   = (checkout - checkin).days
+    queryset = annotate_stay_bounds(queryset, checkin, checkout, total)
+    matches  = get_price_condition(price_min, None, 'stay_low') & get_price_condition(None, price_max, 'stay_high')
+    overlaps = get_price_condition(price_min, None, 'stay_high') & get_price_condition(None, price_max, 'stay_low')
+
+    straddling_ids = []
+    for accommodation_id, price, cleaning_fee, origin, prefix_sums in queryset.filter(overlaps & ~matches).values_list(
+        'id', 'price', 'cleaning_fee', 'price_schedule__origin', 'price_schedule__prefix_sums'
+    ):
+        if total:
+            stay_price = get_stay_total(price, cleaning_fee, checkin, checkout, origin, prefix_sums)
+        else:
+            stay_price = get_stay_total(price, 0, checkin, checkout, origin, prefix_sums) / nights
+
+        if (price_min is None or stay_price > price_min) and (price_max is None or stay_price < price_max):
+            straddling_ids.append(accommodation_id)
+
+    return queryset.filter(matches | Q(id__in=straddling_ids))
+
+def quote_stays(stays, queryset=None):
+    queryset       = Accommodation.objects.all() if queryset is None else queryset
+    accommodations = {
+        accommodation_id: accommodation
+        for accommodation_id, *accommodation in queryset.filter(
+            id__in = {stay[0] for stay in stays}
+        ).values_list('id', 'price', 'cleaning_fee', 'max_capacity', 'price_schedule__origin', 'price_schedule__prefix_sums')
+    }
+
+    quotes = []
+    for accommodation_id, checkin, checkout, guests in stays:
+        if accommodation_id not in accommodations:
+            quotes.append((None, 'PAGE_NOT_FOUND'))
+            continue
+
+        price, cleaning_fee, max_capacity, origin, prefix_sums = accommodations[accommodation_id]
+
+        if guests > max_capacity:
+            quotes.append((None, 'INVALID_GUESTS'))
+        else:
+            quotes.append((get_stay_total(price, cleaning_fee, checkin, checkout, origin, prefix_sums), None))
+
+    return quotes
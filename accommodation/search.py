@@ -0,0 +1,144 @@
+import math
+
+from datetime                   import datetime
+
+from django.db.models           import Q, FloatField
+from django.db.models.functions import Cast
+
+from .models                    import Accommodation
+from .availability              import get_availability_condition
+from .fulltext                  import search_accommodations
+from .pricing                   import filter_by_price
+from .geo                       import cover_bounding_box, get_radius_bounding_box, KM_PER_LAT_DEGREE, KM_PER_LNG_DEGREE
+
+SORT_FIELDS = {
+    'price'   : 'price',
+    'rating'  : '-rating',
+    'reviews' : '-review_count',
+    'newest'  : '-id'
+}
+
+PRICE_MODES = ['nightly', 'total']
+
+SEARCH_ERRORS = [
+    'INVALID_PRICE_MODE', 'INVALID_LOCATION', 'INVALID_GUESTS', 'INVALID_ROOMTYPE', 'INVALID_DATE', 'INVALID_PRICE', 'INVALID_SORT'
+]
+
+CATEGORY_NAMES = {
+    'entire'  : '집 전체',
+    'private' : '개인실',
+    'shared'  : '다인실',
+    'hotel'   : '호텔 객실'
+}
+
+def get_viewport_condition(sw_lat, sw_lng, ne_lat, ne_lng):
+    condition = Q()
+    for prefix in cover_bounding_box(sw_lat, sw_lng, ne_lat, ne_lng):
+        condition.add(Q(geohash__startswith=prefix), Q.OR)
+
+    if sw_lng <= ne_lng:
+        longitude_condition = Q(longitude__gte=sw_lng, longitude__lte=ne_lng)
+    else:
+        longitude_condition = Q(longitude__gte=sw_lng) | Q(longitude__lte=ne_lng)
+
+    return condition & Q(latitude__gte=sw_lat, latitude__lte=ne_lat) & longitude_condition
+
+def filter_accommodations(params, skip=()):
+    checkin    = params.get('checkin')
+    checkout   = params.get('checkout')
+    guests     = params.get('guests')
+    categories = params.getlist('roomtype')
+    price_min  = params.get('min')
+    price_max  = params.get('max')
+    price_mode = params.get('price_mode', 'nightly')
+    query      = params.get('q', '').strip()
+
+    if price_mode not in PRICE_MODES:
+        raise ValueError('INVALID_PRICE_MODE')
+
+    try:
+        guests = int(guests) if guests else None
+    except ValueError:
+        raise ValueError('INVALID_GUESTS')
+
+    if any(category not in CATEGORY_NAMES for category in categories):
+        raise ValueError('INVALID_ROOMTYPE')
+
+    try:
+        viewport = [float(params[key]) for key in ['sw_lat', 'sw_lng', 'ne_lat', 'ne_lng'] if key in params]
+        center   = [float(params[key]) for key in ['lat', 'lng', 'radius'] if key in params]
+    except ValueError:
+        raise ValueError('INVALID_LOCATION')
+
+    if len(viewport) not in [0, 4] or len(center) not in [0, 3]:
+        raise ValueError('INVALID_LOCATION')
+
+    if not all(math.isfinite(value) for value in viewport + center):
+        raise ValueError('INVALID_LOCATION')
+
+    latitudes  = viewport[0::2] + center[:1]
+    longitudes = viewport[1::2] + center[1:2]
+
+    if any(abs(latitude) > 90 for latitude in latitudes) or any(abs(longitude) > 180 for longitude in longitudes):
+        raise ValueError('INVALID_LOCATION')
+
+    if center and center[2] <= 0:
+        raise ValueError('INVALID_LOCATION')
+
+    condition = Q()
+
+    if center:
+        viewport = list(get_radius_bounding_box(*center))
+
+    if viewport:
+        condition.add(get_viewport_condition(*viewport), Q.AND)
+
+    if guests is not None:
+        condition.add(Q(max_capacity__gt=guests), Q.AND)
+
+    if len(categories) and 'roomtype' not in skip:
+        categories = [CATEGORY_NAMES[category] for category in categories]
+
+        condition.add(Q(category__name__in=categories), Q.AND)
+
+    queryset = Accommodation.objects.filter(condition)
+
+    if query:
+        queryset = search_accommodations(queryset, query)
+
+    if center:
+        latitude, longitude, radius = center
+        queryset = queryset.annotate(
+            distance = (
+                (Cast('latitude', FloatField()) - latitude) * KM_PER_LAT_DEGREE
+            ) ** 2 + (
+                (Cast('longitude', FloatField()) - longitude) * KM_PER_LNG_DEGREE * math.cos(math.radians(latitude))
+            ) ** 2
+        ).filter(distance__lte=radius ** 2)
+
+    if (checkin and checkout):
+        try:
+            checkin  = datetime.strptime(checkin, "%Y-%m-%d").date()
+            checkout = datetime.strptime(checkout, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValueError('INVALID_DATE')
+
+        queryset = queryset.filter(get_availability_condition(checkin, checkout))
+    else:
+        checkin = checkout = None
+
+    if 'price' not in skip and (price_min or price_max):
+        queryset = filter_by_price(queryset, price_min, price_max, checkin, checkout, price_mode == 'total')
+
+    return queryset
+
+def get_sort_field(params):
+    sort = params.get('sort')
+
+    if sort and sort not in SORT_FIELDS:
+        raise ValueError('INVALID_SORT')
+
+    if sort:
+        return SORT_FIELDS[sort]
+
+    return '-relevance' if params.get('q', '').strip() else 'id'
@@ -0,0 +1,99 @@
+from contextlib               import contextmanager
+
+from django.db.models         import F, Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch          import receiver
+
+from user.models              import User
+from reservation.models       import Reservation
+from review.models            import Review
+from .models                  import Accommodation, Category, Image, UnavailableDate, PriceOverride
+from .pricing                 import rebuild_price_schedule
+from .cache                   import bump_search_version
+from .fulltext                import index_accommodation
+
+@receiver(post_save, sender=Accommodation)
+def update_search_terms(sender, instance, **kwargs):
+    index_accommodation(instance)
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def update_cover_image(sender, instance, **kwargs):
+    Accommodation.objects.filter(id=instance.accommodation_id).update(
+        cover_image_url = Image.objects.get_cover_url(instance.accommodation_id)
+    )
+
+@receiver(post_save, sender=PriceOverride)
+@receiver(post_delete, sender=PriceOverride)
+def update_price_schedule(sender, instance, **kwargs):
+    price = Accommodation.objects.filter(id=instance.accommodation_id).values_list('price', flat=True).first()
+
+    if price is not None:
+        rebuild_price_schedule(instance.accommodation_id, price)
+
+@receiver(post_save, sender=Accommodation)
+def reprice_schedule(sender, instance, created, **kwargs):
+    if not created:
+        rebuild_price_schedule(instance.id, instance.price)
+
+@receiver(post_save, sender=Accommodation)
+@receiver(post_save, sender=Image)
+@receiver(post_save, sender=UnavailableDate)
+@receiver(post_save, sender=Reservation)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=PriceOverride)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Accommodation)
+@receiver(post_delete, sender=Image)
+@receiver(post_delete, sender=UnavailableDate)
+@receiver(post_delete, sender=Reservation)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=PriceOverride)
+@receiver(post_delete, sender=Category)
+def invalidate_search_cache(sender, **kwargs):
+    bump_search_version()
+
+@receiver(post_save, sender=Image)
+@receiver(post_save, sender=UnavailableDate)
+@receiver(post_save, sender=Reservation)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Image)
+@receiver(post_delete, sender=UnavailableDate)
+@receiver(post_delete, sender=Reservation)
+@receiver(post_delete, sender=Review)
+def bump_accommodation_version(sender, instance, **kwargs):
+    if instance.accommodation_id:
+        Accommodation.objects.filter(id=instance.accommodation_id).update(version=F('version') + 1)
+
+@receiver(post_save, sender=Accommodation)
+def bump_own_version(sender, instance, created, **kwargs):
+    if not created:
+        Accommodation.objects.filter(id=instance.id).update(version=F('version') + 1)
+
+@receiver(post_save, sender=User)
+def bump_user_accommodation_versions(sender, instance, created, **kwargs):
+    if not created:
+        Accommodation.objects.filter(Q(user_id=instance.id) | Q(review__user_id=instance.id)).update(version=F('version') + 1)
+
+@receiver(post_save, sender=Category)
+def bump_category_accommodation_versions(sender, instance, created, **kwargs):
+    if not created:
+        Accommodation.objects.filter(category_id=instance.id).update(version=F('version') + 1)
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def clear_category_cache(sender, **kwargs):
+    Category.objects.clear_cache()
+
+LISTING_SAVE_RECEIVERS = [update_search_terms, reprice_schedule, invalidate_search_cache, bump_own_version]
+
+@contextmanager
+def muted_listing_signals():
+    for listing_receiver in LISTING_SAVE_RECEIVERS:
+        post_save.disconnect(listing_receiver, sender=Accommodation)
+
+    try:
+        yield
+    finally:
+        for listing_receiver in LISTING_SAVE_RECEIVERS:
+            post_save.connect(listing_receiver, sender=Accommodation)
@@ -1,23 +1,37 @@
+import os
 import unittest
 import json
+import base64
+import tempfile
 import boto3
 import jwt
-from datetime             import datetime
-from decimal              import Decimal
-from unittest.mock        import patch, MagicMock
+from io                     import StringIO
+from datetime               import datetime, date, timedelta
+from decimal                import Decimal
+from unittest.mock          import patch, MagicMock
 
-from django.test          import TestCase, Client
-from django.test.utils    import override_settings
-from django.core.files    import File
+from django.test            import TestCase, Client
+from django.test.utils      import override_settings, CaptureQueriesContext
+from django.db              import connection
+from django.core.files      import File
+from django.core.cache      import caches
+from django.core.management import call_command, CommandError
 
-from user.models          import User, SocialPlatform
-from review.models        import Review
-from accommodation.models import Category, Accommodation, Image, UnavailableDate
-from my_settings          import SECRET_KEY, ALGORITHM
+from user.models            import User, SocialPlatform
+from review.models          import Review
+from reservation.models     import Reservation, ReservationStatus
+from accommodation.models   import Category, Accommodation, Image, UnavailableDate, ImportCheckpoint, PriceOverride
+from accommodation.cache    import bump_search_version
+from accommodation.fulltext import tokenize_query
+from accommodation.pricing  import get_stay_total
+from my_settings            import SECRET_KEY, ALGORITHM
 
 maxDiff = None
 client  = Client()
 
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
 class FileUploadTest(TestCase):
     @patch('accommodation.views.boto3.client')
     def test_post_one_image_success(self, mock_s3client):
@@ -204,6 +218,73 @@ class AccommodationRegisterTest(TestCase):
             }
         )
 
+    def get_register_body(self, image_count, date_count):
+        return {
+            'roomType'    : '집 전체',
+            'title'       : 'nice house',
+            'address'     : '선릉',
+            'lat'         : 37.5,
+            'long'        : 127.05,
+            'description' : 'desc',
+            'maxPeople'   : 5,
+            'onedayPrice' : 120000.00,
+            'cleaningFee' : 1000.050000,
+            'beds'        : 1,
+            'bedrooms'    : 2,
+            'bathrooms'   : 1,
+            'imgUrls'     : [f'http://image{index}.jpg' for index in range(image_count)],
+            'unavailableDates': [{
+                'start_date': f'2021-03-{index + 1:02d}',
+                'end_date'  : f'2021-03-{index + 2:02d}'
+            } for index in range(date_count)]
+        }
+
+    def test_accommodation_register_post_query_count_constant(self):
+        access_token = jwt.encode({'user': 1}, SECRET_KEY, ALGORITHM)
+        headers      = {'HTTP_Authorization': access_token}
+        query_counts = []
+
+        Category.objects.get_by_name('집 전체')
+        for image_count, date_count in [(1, 1), (30, 20)]:
+            with CaptureQueriesContext(connection) as context:
+                response = client.post('/accommodation', json.dumps(self.get_register_body(image_count, date_count)), content_type='application/json', **headers)
+            self.assertEqual(response.status_code, 200)
+            query_counts.append(len(context.captured_queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(Image.objects.count(), 31)
+        self.assertEqual(UnavailableDate.objects.count(), 2)
+
+    def test_accommodation_register_post_coalesces_unavailable_dates(self):
+        access_token = jwt.encode({'user': 1}, SECRET_KEY, ALGORITHM)
+        headers      = {'HTTP_Authorization': access_token}
+        body         = self.get_register_body(1, 0)
+        body['unavailableDates'] = [
+            {'start_date': '2021-03-10', 'end_date': '2021-03-15'},
+            {'start_date': '2021-03-01', 'end_date': '2021-03-05'},
+            {'start_date': '2021-03-12', 'end_date': '2021-03-20'},
+            {'start_date': '2021-03-05', 'end_date': '2021-03-07'},
+        ]
+
+        response = client.post('/accommodation', json.dumps(body), content_type='application/json', **headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(UnavailableDate.objects.order_by('start_date').values_list('start_date', 'end_date')),
+            [(date(2021, 3, 1), date(2021, 3, 7)), (date(2021, 3, 10), date(2021, 3, 20))]
+        )
+
+    def test_accommodation_register_post_rolls_back_on_error(self):
+        access_token = jwt.encode({'user': 1}, SECRET_KEY, ALGORITHM)
+        headers      = {'HTTP_Authorization': access_token}
+        body         = self.get_register_body(2, 1)
+        del body['imgUrls']
+
+        response = client.post('/accommodation', json.dumps(body), content_type='application/json', **headers)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Accommodation.objects.count(), 0)
+
 class AccommodationDetailTest(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -334,11 +415,120 @@ class AccommodationDetailTest(TestCase):
                      "content"    : "good",
                      "createdAt"  : "202103"
                   }
-               ]
+               ],
+               "commentNext":None
             }
         )
         self.assertEqual(response.status_code, 200)  
 
+    def test_accommodation_detail_get_query_count_constant(self):
+        with self.assertNumQueries(3):
+            response = client.get('/accommodation/1')
+        self.assertEqual(len(response.json()["comment"]), 1)
+
+        for review_id in range(2, 52):
+            Review.objects.create(
+                id                 = review_id,
+                accommodation_id   = 1,
+                user_id            = review_id % 2 + 1,
+                clean_rate         = 4,
+                communication_rate = 4,
+                checkin_rate       = 4,
+                accuracy_rate      = 4,
+                location_rate      = 4,
+                value_rate         = 4,
+                content            = 'good'
+            )
+
+        with self.assertNumQueries(3):
+            response = client.get('/accommodation/1')
+        self.assertEqual(len(response.json()["comment"]), 10)
+        self.assertEqual(response.json()["comment"][1]["userName"], 'test')
+        self.assertEqual(response.json()["comment"][2]["userName"], 'test2')
+        self.assertIsNotNone(response.json()["commentNext"])
+
+    def test_accommodation_reviews_get_pages(self):
+        for review_id in range(2, 26):
+            Review.objects.create(
+                id                 = review_id,
+                accommodation_id   = 1,
+                user_id            = 2,
+                clean_rate         = 4,
+                communication_rate = 4,
+                checkin_rate       = 4,
+                accuracy_rate      = 4,
+                location_rate      = 4,
+                value_rate         = 4,
+                content            = f'review {review_id}'
+            )
+
+        cursor     = client.get('/accommodation/1').json()["commentNext"]
+        review_ids = []
+        while cursor:
+            with self.assertNumQueries(1):
+                response = client.get(f'/accommodation/1/reviews?cursor={cursor}&limit=10')
+            review_ids += [review['reviewid'] for review in response.json()["comment"]]
+            cursor      = response.json()["next"]
+
+        self.assertEqual(review_ids, list(range(11, 26)))
+
+    def test_accommodation_reviews_get_limit(self):
+        response = client.get('/accommodation/1/reviews?limit=x')
+        self.assertEqual(response.json(), {'message': 'INVALID_LIMIT'})
+        self.assertEqual(response.status_code, 400)
+
+        response = client.get('/accommodation/1/reviews?limit=-1')
+        self.assertEqual(len(response.json()["comment"]), 1)
+        self.assertEqual(response.status_code, 200)
+
+    def test_accommodation_reviews_get_tampered_cursor(self):
+        for values in [['abc', 1], [{'a': 1}, 1], [f'{datetime.now().isoformat()}', 'abc']]:
+            response = client.get(f'/accommodation/1/reviews?cursor={encode_cursor(values)}')
+            self.assertEqual(response.json(), {'message': 'INVALID_CURSOR'})
+            self.assertEqual(response.status_code, 400)
+
+    def test_accommodation_reviews_get_not_found(self):
+        response = client.get('/accommodation/99999999/reviews')
+        self.assertEqual(response.json(), {"message": "PAGE_NOT_FOUND"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_accommodation_detail_get_not_modified(self):
+        etag = client.get('/accommodation/1')['ETag']
+
+        with self.assertNumQueries(1):
+            response = client.get('/accommodation/1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        Image.objects.create(accommodation_id=1, image_url='house_image3.jpg')
+
+        response = client.get('/accommodation/1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_accommodation_detail_get_modified_by_host_reviewer_and_category(self):
+        Review.objects.create(
+            accommodation_id   = 1,
+            user_id            = 2,
+            clean_rate         = 4,
+            communication_rate = 4,
+            checkin_rate       = 4,
+            accuracy_rate      = 4,
+            location_rate      = 4,
+            value_rate         = 4,
+            content            = 'nice'
+        )
+
+        for model, object_id, field, value in [(User, 1, 'name', 'host'), (User, 2, 'profile_image', 'new.jpg'), (Category, 1, 'description', 'new')]:
+            etag = client.get('/accommodation/1')['ETag']
+
+            row = model.objects.get(id=object_id)
+            setattr(row, field, value)
+            row.save()
+
+            response = client.get('/accommodation/1', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+
     def test_accommodation_detail_get_not_found(self):
         response = client.get('/accommodation/99999999')
         self.assertEqual(response.json(),
@@ -494,6 +684,9 @@ class AccommodationListTest(TestCase):
             image_url     = 'test_accommodation_3_image_2.jpg'
         )
       
+    def setUp(self):
+        caches['search'].clear()
+
     def test_get_accommodation_list_view_success_checkin_03_17_checkout_03_23(self):
         response = client.get('/accommodation?checkin=2021-03-17&checkout=2021-03-23&guests=1')
         self.assertEqual(response.json()["data"],
@@ -899,3 +1092,573 @@ class AccommodationListTest(TestCase):
     
     
 
+
+    def test_get_accommodation_list_view_viewport(self):
+        response = client.get('/accommodation?sw_lat=37.3&sw_lng=100.0&ne_lat=37.45&ne_lng=100.5')
+        self.assertEqual([row['id'] for row in response.json()["data"]], [2, 3])
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_accommodation_list_view_radius(self):
+        response = client.get('/accommodation?lat=37.4444&lng=100.1111&radius=5')
+        self.assertEqual([row['id'] for row in response.json()["data"]], [2])
+
+        response = client.get('/accommodation?lat=37.4444&lng=100.1111&radius=30')
+        self.assertEqual([row['id'] for row in response.json()["data"]], [2, 3])
+
+    def test_get_accommodation_list_view_invalid_location(self):
+        response = client.get('/accommodation?sw_lat=37.3&sw_lng=100.0')
+        self.assertEqual(response.json(), {'message': 'INVALID_LOCATION'})
+        self.assertEqual(response.status_code, 400)
+
+        for query in [
+            'sw_lat=inf&sw_lng=100.0&ne_lat=37.5&ne_lng=100.2',
+            'sw_lat=nan&sw_lng=100.0&ne_lat=37.5&ne_lng=100.2',
+            'sw_lat=-91&sw_lng=100.0&ne_lat=37.5&ne_lng=100.2',
+            'sw_lat=37.3&sw_lng=100.0&ne_lat=37.5&ne_lng=181',
+            'lat=37.4&lng=100.1&radius=inf',
+            'lat=37.4&lng=100.1&radius=0',
+            'lat=90.5&lng=100.1&radius=5',
+        ]:
+            response = client.get(f'/accommodation?{query}')
+            self.assertEqual(response.json(), {'message': 'INVALID_LOCATION'})
+            self.assertEqual(response.status_code, 400)
+
+    def test_get_accommodation_list_view_cached(self):
+        response = client.get('/accommodation?guests=1&roomtype=private&roomtype=entire')
+
+        with self.assertNumQueries(1):
+            cached_response = client.get('/accommodation?roomtype=entire&roomtype=private&guests=1')
+        self.assertEqual(cached_response.json(), response.json())
+
+        Image.objects.create(accommodation_id=3, image_url='test_accommodation_3_image_3.jpg')
+
+        response = client.get('/accommodation?guests=1&roomtype=entire&roomtype=private')
+        self.assertEqual(len(response.json()["data"][2]["img"]), 3)
+
+    def test_get_accommodation_list_view_keyword(self):
+        response = client.get('/accommodation?q=Accommodation 3')
+        self.assertEqual([row['id'] for row in response.json()["data"]], [3])
+
+        response = client.get('/accommodation?q=없는 숙소')
+        self.assertEqual(response.json()["data"], [])
+
+    def test_get_accommodation_list_view_keyword_queries_bigrams(self):
+        self.assertEqual(tokenize_query('강남역 Room 3 강'), ['강남', '남역', 'room', '3', '강'])
+
+        response = client.get('/accommodation?q=강')
+        self.assertEqual(sorted(row['id'] for row in response.json()["data"]), [1, 2, 3])
+
+    def test_get_accommodation_list_view_keyword_ranked(self):
+        accommodation       = Accommodation.objects.get(id=2)
+        accommodation.title = '강남역 test accommodation 2'
+        accommodation.save()
+
+        response = client.get('/accommodation?q=강남')
+        self.assertEqual([row['id'] for row in response.json()["data"]], [2, 3, 1])
+
+        response = client.get('/accommodation?q=강남&cursor=&limit=2')
+        self.assertEqual([row['id'] for row in response.json()["data"]], [2, 3])
+
+        response = client.get(f'/accommodation?q=강남&cursor={response.json()["next"]}&limit=2')
+        self.assertEqual([row['id'] for row in response.json()["data"]], [1])
+
+    def test_get_accommodation_facets(self):
+        response = client.get('/accommodation/facets?guests=1')
+        self.assertEqual(response.json(), {
+            'message' : 'SUCCESS',
+            'roomtype': {'entire': 2, 'private': 1, 'shared': 0, 'hotel': 0},
+            'price'   : [
+                {'min': 10000, 'max': 20000, 'count': 1},
+                {'min': 20000, 'max': 30000, 'count': 1},
+                {'min': 30000, 'max': 40000, 'count': 1}
+            ]
+        })
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_accommodation_facets_drill_down_cached(self):
+        client.get('/accommodation/facets?guests=1&lat=37.4444&lng=100.1111&radius=30')
+
+        with self.assertNumQueries(1):
+            response = client.get('/accommodation/facets?guests=1&lat=37.4444&lng=100.1111&radius=30&roomtype=private&min=19000')
+        self.assertEqual(response.json(), {
+            'message' : 'SUCCESS',
+            'roomtype': {'entire': 1, 'private': 1, 'shared': 0, 'hotel': 0},
+            'price'   : [{'min': 30000, 'max': 40000, 'count': 1}]
+        })
+
+    def test_get_accommodation_facets_invalid_filter(self):
+        response = client.get('/accommodation/facets?roomtype=castle')
+        self.assertEqual(response.json(), {'message': 'INVALID_FILTER'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_accommodation_invalid_guests(self):
+        for path in ['/accommodation?guests=abc', '/accommodation/facets?guests=abc']:
+            response = client.get(path)
+            self.assertEqual(response.json(), {'message': 'INVALID_GUESTS'})
+            self.assertEqual(response.status_code, 400)
+
+        response = client.get('/accommodation?roomtype=castle')
+        self.assertEqual(response.json(), {'message': 'INVALID_ROOMTYPE'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_accommodation_list_view_not_modified(self):
+        etag = client.get('/accommodation?guests=1')['ETag']
+
+        with self.assertNumQueries(1):
+            response = client.get('/accommodation?guests=1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Review.objects.create(
+            accommodation_id   = 2,
+            user_id            = 1,
+            clean_rate         = 4,
+            communication_rate = 4,
+            checkin_rate       = 4,
+            accuracy_rate      = 4,
+            location_rate      = 4,
+            value_rate         = 4,
+            content            = 'good'
+        )
+
+        response = client.get('/accommodation?guests=1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"][1]["gradeNum"], 1)
+
+    def test_get_accommodation_list_view_sees_version_bumped_by_other_process(self):
+        etag = client.get('/accommodation?guests=1')['ETag']
+
+        Accommodation.objects.filter(id=1).update(title='renamed accommodation 1')
+        with patch('accommodation.cache.search_cache', type(caches['search'])('worker-process', {})):
+            bump_search_version()
+
+        response = client.get('/accommodation?guests=1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"][0]["title"], 'renamed accommodation 1')
+
+    def test_get_accommodation_list_view_query_count_constant(self):
+        with self.assertNumQueries(4):
+            response = client.get('/accommodation?limit=1&offset=1')
+        self.assertEqual(len(response.json()["data"]), 1)
+
+        with self.assertNumQueries(4):
+            response = client.get('/accommodation?limit=15&offset=15')
+        self.assertEqual(len(response.json()["data"]), 3)
+
+    def test_get_accommodation_list_view_cursor_pages(self):
+        with self.assertNumQueries(3):
+            response = client.get('/accommodation?cursor=&limit=2')
+        first_page = response.json()
+        self.assertEqual([row['id'] for row in first_page["data"]], [1, 2])
+        self.assertNotIn('count', first_page)
+
+        with self.assertNumQueries(3):
+            response = client.get(f'/accommodation?cursor={first_page["next"]}&limit=2')
+        second_page = response.json()
+        self.assertEqual([row['id'] for row in second_page["data"]], [3])
+        self.assertEqual(second_page["next"], None)
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_accommodation_list_view_gallery_capped(self):
+        for position in range(8):
+            Image.objects.create(accommodation_id=1, image_url=f'http://gallery{position}.jpg', position=position + 1)
+        cover = Image.objects.create(accommodation_id=1, image_url='http://cover.jpg', position=9, is_cover=True)
+
+        self.assertEqual(Accommodation.objects.get(id=1).cover_image_url, 'http://cover.jpg')
+
+        for supports_over_clause in [True, False]:
+            caches['search'].clear()
+            with patch.object(connection.features, 'supports_over_clause', supports_over_clause):
+                response = client.get('/accommodation?limit=1&offset=1')
+
+            images = response.json()['data'][0]['img']
+            self.assertEqual(len(images), 5)
+            self.assertEqual(images[0], 'http://cover.jpg')
+
+        cover.delete()
+        self.assertEqual(Accommodation.objects.get(id=1).cover_image_url, Image.objects.filter(accommodation_id=1).order_by('id').first().image_url)
+
+    def test_get_accommodation_list_view_sort(self):
+        for sort, ids in [('price', [1, 2, 3]), ('rating', [1, 3, 2]), ('reviews', [1, 3, 2]), ('newest', [3, 2, 1])]:
+            response = client.get(f'/accommodation?sort={sort}&limit=3&offset=3')
+            self.assertEqual([row['id'] for row in response.json()['data']], ids)
+
+        response = client.get('/accommodation?sort=cheapest')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message': 'INVALID_SORT'})
+
+    def test_get_accommodation_list_view_sort_cursor_pages(self):
+        first_page  = client.get('/accommodation?sort=rating&cursor=&limit=2').json()
+        second_page = client.get(f'/accommodation?sort=rating&cursor={first_page["next"]}&limit=2').json()
+
+        self.assertEqual([row['id'] for row in first_page['data'] + second_page['data']], [1, 3, 2])
+        self.assertEqual(second_page['next'], None)
+
+    def test_get_accommodation_list_view_total_price(self):
+        stay = 'checkin=2030-01-01&checkout=2030-01-03'
+
+        response = client.get(f'/accommodation?{stay}&max=40000&limit=3&offset=3')
+        self.assertEqual([row['id'] for row in response.json()['data']], [1, 2, 3])
+
+        response = client.get(f'/accommodation?{stay}&max=40000&price_mode=total&limit=3&offset=3')
+        self.assertEqual([row['id'] for row in response.json()['data']], [1])
+
+        response = client.get(f'/accommodation?{stay}&min=40000&max=60000&price_mode=total&limit=3&offset=3')
+        self.assertEqual([row['id'] for row in response.json()['data']], [2])
+
+        response = client.get(f'/accommodation?{stay}&price_mode=sum')
+        self.assertEqual(response.json(), {'message': 'INVALID_PRICE_MODE'})
+
+    def test_get_accommodation_facets_total_price(self):
+        stay = 'checkin=2030-01-01&checkout=2030-01-03'
+
+        response = client.get(f'/accommodation/facets?{stay}&max=40000&price_mode=total')
+        self.assertEqual(response.json()['roomtype'], {'entire': 1, 'private': 0, 'shared': 0, 'hotel': 0})
+
+        response = client.get(f'/accommodation/facets?{stay}&min=40000&price_mode=total&roomtype=entire')
+        self.assertEqual(response.json()['roomtype'], {'entire': 1, 'private': 1, 'shared': 0, 'hotel': 0})
+        self.assertEqual(len(response.json()['price']), 2)
+
+    def test_get_accommodation_list_view_cursor_count(self):
+        response = client.get('/accommodation?cursor=&limit=1&count=exact')
+        self.assertEqual(response.json()["count"], 3)
+
+        response = client.get('/accommodation?cursor=&limit=1&roomtype=private&count=estimate')
+        self.assertEqual(response.json()["count"], 1)
+
+    def test_get_accommodation_list_view_invalid_cursor(self):
+        response = client.get('/accommodation?cursor=invalid')
+        self.assertEqual(response.json(), {'message': 'INVALID_CURSOR'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_accommodation_list_view_tampered_cursor(self):
+        for sort, values in [('price', ['abc', 1]), ('rating', ['abc', 1]), ('newest', [{'a': 1}, 1]), ('price', [10000, 'abc'])]:
+            response = client.get(f'/accommodation?sort={sort}&cursor={encode_cursor(values)}')
+            self.assertEqual(response.json(), {'message': 'INVALID_CURSOR'})
+            self.assertEqual(response.status_code, 400)
+
+        response = client.get(f'/accommodation?cursor={encode_cursor([{"a": 1}, 1])}')
+        self.assertEqual(response.json(), {'message': 'INVALID_CURSOR'})
+
+    def test_get_accommodation_list_view_invalid_offset(self):
+        response = client.get('/accommodation?offset=5&limit=15')
+        self.assertEqual(response.json(), {'message': 'INVALID_OFFSET'})
+        self.assertEqual(response.status_code, 400)
+
+        response = client.get('/accommodation?limit=2')
+        self.assertEqual(len(response.json()['data']), 2)
+
+    def test_get_accommodation_list_view_invalid_limit(self):
+        for limit in ['0', '-1', 'x']:
+            response = client.get(f'/accommodation?cursor=&limit={limit}')
+            self.assertEqual(response.json(), {'message': 'INVALID_LIMIT'})
+            self.assertEqual(response.status_code, 400)
+
+        with patch('accommodation.views.MAX_SEARCH_PAGE_SIZE', 2):
+            response = client.get('/accommodation?cursor=&limit=1000')
+        self.assertEqual(len(response.json()['data']), 2)
+        self.assertIsNotNone(response.json()['next'])
+
+class AccommodationAvailabilityTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        SocialPlatform.objects.create(id=1, name='kakao')
+        ReservationStatus.objects.create(code=2, name='booked')
+        ReservationStatus.objects.create(code=3, name='canceled')
+
+        User.objects.create(
+            id                 = 1,
+            email              = 'test@gmail.com',
+            name               = 'test',
+            profile_image      = 'profile_image.jpg',
+            social_platform_id = 1
+        )
+
+        Category.objects.create(id=1, name='집 전체', description='집 전체쟈나')
+
+        for accommodation_id in range(1, 6):
+            Accommodation.objects.create(
+                id                 = accommodation_id,
+                category_id        = 1,
+                user_id            = 1,
+                title              = f'test accommodation {accommodation_id}',
+                address            = '서울특별시 강남구 테헤란로',
+                latitude           = 37.5,
+                longitude          = 127.05,
+                description        = 'test description',
+                max_capacity       = 5,
+                price              = 10000,
+                cleaning_fee       = 1000,
+                number_of_bed      = 1,
+                number_of_bedroom  = 1,
+                number_of_bathroom = 1
+            )
+
+        cls.checkin  = date.today() + timedelta(days=100)
+        cls.checkout = cls.checkin + timedelta(days=3)
+
+        for week in range(50):
+            start_date = cls.checkout + timedelta(days=week * 7)
+            UnavailableDate.objects.create(accommodation_id=1, start_date=start_date, end_date=start_date + timedelta(days=3))
+
+        UnavailableDate.objects.create(accommodation_id=2, start_date=cls.checkin + timedelta(days=2), end_date=cls.checkout + timedelta(days=5))
+
+        Reservation.objects.create(
+            accommodation_id = 3,
+            user_id          = 1,
+            start_date       = cls.checkin - timedelta(days=1),
+            end_date         = cls.checkin + timedelta(days=1),
+            total_price      = 10000,
+            total_guest      = 1,
+            status_id        = 2
+        )
+
+        Reservation.objects.create(
+            accommodation_id = 4,
+            user_id          = 1,
+            start_date       = cls.checkin,
+            end_date         = cls.checkout,
+            total_price      = 10000,
+            total_guest      = 1,
+            status_id        = 3
+        )
+
+    def setUp(self):
+        caches['search'].clear()
+        caches['default'].clear()
+
+    def get_available_ids(self, checkin, checkout):
+        response = client.get(f'/accommodation?checkin={checkin}&checkout={checkout}&guests=1')
+        return [row['id'] for row in response.json()['data']]
+
+    def test_availability_filters_blocked_and_booked_ranges(self):
+        self.assertEqual(self.get_available_ids(self.checkin, self.checkout), [1, 4, 5])
+
+    def test_availability_follows_unavailable_date_changes(self):
+        UnavailableDate.objects.filter(accommodation_id=2).delete()
+        self.assertEqual(self.get_available_ids(self.checkin, self.checkout), [1, 2, 4, 5])
+
+        UnavailableDate.objects.create(accommodation_id=5, start_date=self.checkout - timedelta(days=1), end_date=self.checkout)
+        self.assertEqual(self.get_available_ids(self.checkin, self.checkout), [1, 2, 4])
+
+    def test_availability_checkout_day_is_free(self):
+        checkin = self.checkout + timedelta(days=3)
+        self.assertEqual(self.get_available_ids(checkin, checkin + timedelta(days=4)), [1, 3, 4, 5])
+
+    def test_pending_reservation_blocks_search_and_calendar(self):
+        ReservationStatus.objects.create(code=1, name='pending')
+        Reservation.objects.create(
+            accommodation_id = 5,
+            user_id          = 1,
+            start_date       = self.checkin,
+            end_date         = self.checkout,
+            total_price      = 30000,
+            total_guest      = 1,
+            status_id        = 1
+        )
+
+        self.assertEqual(self.get_available_ids(self.checkin, self.checkout), [1, 4])
+        self.assertEqual(self.get_calendar(5, 2).count('1'), 3)
+
+    def test_price_filter_uses_price_overrides_for_stay(self):
+        PriceOverride.objects.create(accommodation_id=5, start_date=self.checkin, end_date=self.checkin + timedelta(days=2), price=40000)
+
+        response = client.get(f'/accommodation?checkin={self.checkin}&checkout={self.checkout}&guests=1&min=20000')
+        self.assertEqual([row['id'] for row in response.json()['data']], [5])
+
+        response = client.get(f'/accommodation?checkin={self.checkin}&checkout={self.checkout}&guests=1&max=35000')
+        self.assertEqual([row['id'] for row in response.json()['data']], [1, 4, 5])
+
+        response = client.get(f'/accommodation?checkin={self.checkin}&checkout={self.checkout}&guests=1&max=20000')
+        self.assertEqual([row['id'] for row in response.json()['data']], [1, 4])
+
+        response = client.get('/accommodation?guests=1&min=20000')
+        self.assertEqual(response.json()['data'], [])
+
+        response = client.get('/accommodation?guests=1&min=many')
+        self.assertEqual(response.json(), {'message': 'INVALID_PRICE'})
+
+    def test_price_filter_only_evaluates_straddling_schedules(self):
+        PriceOverride.objects.create(accommodation_id=5, start_date=self.checkin, end_date=self.checkin + timedelta(days=2), price=40000)
+        PriceOverride.objects.create(accommodation_id=4, start_date=self.checkin + timedelta(days=200), end_date=self.checkin + timedelta(days=210), price=90000)
+        stay = f'checkin={self.checkin}&checkout={self.checkout}&guests=1'
+
+        with patch('accommodation.pricing.get_stay_total', wraps=get_stay_total) as stay_total:
+            response = client.get(f'/accommodation?{stay}&min=20000')
+        self.assertEqual([row['id'] for row in response.json()['data']], [5])
+        self.assertEqual(stay_total.call_count, 1)
+
+        with patch('accommodation.pricing.get_stay_total', wraps=get_stay_total) as stay_total:
+            response = client.get(f'/accommodation?{stay}&min=5000&max=50000')
+        self.assertEqual([row['id'] for row in response.json()['data']], [1, 4, 5])
+        self.assertEqual(stay_total.call_count, 0)
+
+    def get_calendar(self, accommodation_id, months):
+        response = client.get(f'/accommodation/{accommodation_id}/calendar?from={self.checkin:%Y-%m}&months={months}')
+        return ''.join(month['days'] for month in response.json()['calendar'])
+
+    def test_accommodation_calendar(self):
+        offset = self.checkin.day - 1
+
+        self.assertEqual(self.get_calendar(3, 2).find('1'), offset - 1)
+        self.assertEqual(self.get_calendar(3, 2).count('1'), 2)
+        self.assertNotIn('1', self.get_calendar(4, 2))
+
+        calendar = self.get_calendar(2, 2)
+        self.assertEqual(calendar.find('1'), offset + 2)
+        self.assertEqual(calendar.count('1'), 6)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_calendar(2, 2), calendar)
+
+        UnavailableDate.objects.create(accommodation_id=2, start_date=self.checkin, end_date=self.checkin + timedelta(days=2))
+        calendar = self.get_calendar(2, 2)
+        self.assertEqual(calendar.find('1'), offset)
+        self.assertEqual(calendar.count('1'), 8)
+
+    def test_accommodation_calendar_months(self):
+        response = client.get(f'/accommodation/1/calendar?from=2021-01&months=3')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(month['month'], len(month['days'])) for month in response.json()['calendar']],
+            [('2021-01', 31), ('2021-02', 28), ('2021-03', 31)]
+        )
+        self.assertEqual(client.get('/accommodation/1/calendar?months=13').status_code, 400)
+        self.assertEqual(client.get('/accommodation/1/calendar?from=2021').status_code, 400)
+
+        response = client.get('/accommodation/1/calendar?from=9999-12&months=2')
+        self.assertEqual(response.json(), {'message': 'INVALID_DATE'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(client.get('/accommodation/9/calendar').status_code, 404)
+
+    def test_compact_unavailable_dates(self):
+        for week in range(50):
+            start_date = self.checkout + timedelta(days=week * 7 + 3)
+            UnavailableDate.objects.create(accommodation_id=1, start_date=start_date, end_date=start_date + timedelta(days=4))
+
+        out = StringIO()
+        call_command('compact_unavailable_dates', '--dry-run', stdout=out)
+        self.assertIn('99 unavailable date rows would be removed across 1 accommodations', out.getvalue())
+        self.assertEqual(UnavailableDate.objects.filter(accommodation_id=1).count(), 100)
+
+        out = StringIO()
+        call_command('compact_unavailable_dates', stdout=out)
+        self.assertIn('99 unavailable date rows removed across 1 accommodations', out.getvalue())
+        self.assertEqual(
+            list(UnavailableDate.objects.filter(accommodation_id=1).values_list('start_date', 'end_date')),
+            [(self.checkout, self.checkout + timedelta(days=350))]
+        )
+        self.assertEqual(self.get_available_ids(self.checkin, self.checkout), [1, 4, 5])
+
+class AccommodationImportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        SocialPlatform.objects.create(id=1, name='kakao')
+
+        User.objects.create(
+            id                 = 1,
+            email              = 'test@gmail.com',
+            name               = 'test',
+            profile_image      = 'profile_image.jpg',
+            social_platform_id = 1
+        )
+
+        Category.objects.create(id=1, name='집 전체', description='집 전체쟈나')
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_record(self, index):
+        return {
+            'roomType'        : '집 전체',
+            'title'           : f'imported house {index}',
+            'address'         : '서울특별시 강남구 테헤란로',
+            'lat'             : 37.5,
+            'long'            : 127.05,
+            'description'     : 'desc',
+            'maxPeople'       : 4,
+            'onedayPrice'     : 50000,
+            'cleaningFee'     : 5000,
+            'beds'            : 1,
+            'bedrooms'        : 1,
+            'bathrooms'       : 1,
+            'imgUrls'         : [f'http://image{index}_1.jpg', f'http://image{index}_2.jpg'],
+            'unavailableDates': [{'start_date': '2021-03-04', 'end_date': '2021-03-09'}]
+        }
+
+    def write_file(self, name, lines):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+
+        return path
+
+    def import_file(self, path, *args):
+        call_command('import_accommodations', path, '--user-id', '1', *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_import_ndjson_in_batches(self):
+        invalid_record = self.get_record(2)
+        del invalid_record['title']
+        records = [self.get_record(1), invalid_record, self.get_record(3)]
+        path    = self.write_file('listings.ndjson', [json.dumps(record) for record in records])
+
+        self.import_file(path, '--batch-size', '2')
+
+        self.assertEqual(list(Accommodation.objects.order_by('id').values_list('title', flat=True)), ['imported house 1', 'imported house 3'])
+        self.assertEqual(Image.objects.count(), 4)
+        self.assertEqual(UnavailableDate.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get(source=os.path.abspath(path)).position, 3)
+
+    def test_import_resumes_from_checkpoint(self):
+        path = self.write_file('listings.ndjson', [json.dumps(self.get_record(index)) for index in range(4)])
+        ImportCheckpoint.objects.create(source=os.path.abspath(path), position=2)
+
+        self.import_file(path)
+        self.assertEqual(list(Accommodation.objects.order_by('id').values_list('title', flat=True)), ['imported house 2', 'imported house 3'])
+
+        self.import_file(path)
+        self.assertEqual(Accommodation.objects.count(), 2)
+
+    def test_import_csv_with_workers(self):
+        header = 'roomType,title,address,lat,long,description,maxPeople,onedayPrice,cleaningFee,beds,bedrooms,bathrooms,imgUrls,unavailableDates'
+        rows   = [
+            f'집 전체,csv house {index},서울특별시 강남구 테헤란로,37.5,127.05,desc,4,50000,5000,1,1,1,'
+            f'http://a{index}.jpg|http://b{index}.jpg,2021-03-04~2021-03-09|2021-04-01~2021-04-03'
+            for index in range(5)
+        ]
+        path = self.write_file('listings.csv', [header] + rows)
+
+        self.import_file(path, '--workers', '2', '--batch-size', '2')
+
+        self.assertEqual(Accommodation.objects.count(), 5)
+        self.assertEqual(Image.objects.count(), 10)
+        self.assertEqual(UnavailableDate.objects.count(), 10)
+
+    def test_import_rejects_unknown_host(self):
+        unknown_host = self.get_record(2)
+        unknown_host['userId'] = 999
+        records = [self.get_record(1), unknown_host, dict(self.get_record(3), userId=1)]
+        path    = self.write_file('listings.ndjson', [json.dumps(record) for record in records])
+
+        self.import_file(path)
+
+        self.assertEqual(list(Accommodation.objects.order_by('id').values_list('title', flat=True)), ['imported house 1', 'imported house 3'])
+
+        with self.assertRaises(CommandError):
+            call_command('import_accommodations', path, '--user-id', '999', '--restart', stdout=StringIO(), stderr=StringIO())
+
+    def test_import_inserts_listings_without_per_row_signals(self):
+        query_counts = []
+        for count in [1, 5]:
+            path = self.write_file(f'listings{count}.ndjson', [json.dumps(self.get_record(index)) for index in range(count)])
+
+            with CaptureQueriesContext(connection) as context:
+                self.import_file(path)
+            query_counts.append(len(context.captured_queries))
+
+        self.assertEqual(query_counts[1] - query_counts[0], 4)
+        self.assertEqual(Accommodation.objects.filter(searchterm__term='imported').count(), 6)
+
@@ -1,10 +1,13 @@
 from django.urls import path
 
-from .views      import AccommodationListView, AccomodationDetailView, FileUploadView
+from .views      import AccommodationListView, AccomodationDetailView, AccommodationReviewView, AccommodationCalendarView, AccommodationFacetView, FileUploadView
 
 urlpatterns = [
     path('', AccommodationListView.as_view()),
     path('/<int:accommodation_id>', AccomodationDetailView.as_view()),
+    path('/<int:accommodation_id>/reviews', AccommodationReviewView.as_view()),
+    path('/<int:accommodation_id>/calendar', AccommodationCalendarView.as_view()),
+    path('/facets', AccommodationFacetView.as_view()),
     path('/file', FileUploadView.as_view()),
 ]
 
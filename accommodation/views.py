@@ -2,21 +2,29 @@ import json
 import math
 import boto3
 import uuid 
+import hashlib
 
-from statistics                 import mean
-from datetime                   import datetime
+from decimal                    import Decimal, InvalidOperation
+from datetime                   import datetime, date
 from json.decoder               import JSONDecodeError
 
-from django.http                import JsonResponse
+from django.http                import JsonResponse, HttpResponse, HttpResponseNotModified
 from django.views               import View
-from django.db                  import connection
-from django.db.models           import Avg, Q
+from django.db                  import connection, transaction
+from django.db.models           import Count, Prefetch
 from django.utils.dateformat    import DateFormat
-from django.db.models.functions import Coalesce
+from django.utils.http          import parse_etags
 from django.core.exceptions     import ObjectDoesNotExist
+from django.core.cache          import cache
 
 from user.utils                 import login_decorator
-from .models                    import Accommodation, Category, Image, UnavailableDate
+from review.models              import Review, AccommodationRatingSummary
+from .models                    import Accommodation, Category, Image, UnavailableDate, IMAGE_ORDERING
+from .pagination                import paginate_by_cursor, get_estimated_count, get_ordering
+from .search                    import filter_accommodations, get_sort_field, CATEGORY_NAMES, SEARCH_ERRORS
+from .cache                     import search_cache, get_search_cache_key
+from .availability              import get_blocked_days
+from .intervals                 import coalesce_ranges
 from my_settings                import (
                                     AWS_S3_ACCESS_KEY_ID, 
                                     AWS_S3_SECRET_ACCESS_KEY, 
@@ -24,67 +32,125 @@ from my_settings                import (
                                 )  
 
 
+SEARCH_PAGE_SIZE     = 15
+MAX_SEARCH_PAGE_SIZE = 100
+PRICE_BUCKET_SIZE    = 10000
+FACET_SKIP_PARAMS    = ['roomtype', 'min', 'max', 'price_mode', 'sort', 'limit', 'offset', 'cursor', 'count']
+ROOMTYPE_FACET_SKIP  = ['roomtype', 'sort', 'limit', 'offset', 'cursor', 'count']
+REVIEW_PAGE_SIZE     = 10
+MAX_REVIEW_PAGE_SIZE = 100
+SEARCH_GALLERY_SIZE  = 5
+CALENDAR_MONTHS      = 3
+MAX_CALENDAR_MONTHS  = 12
+CALENDAR_CACHE_TIME  = 60 * 60
+
+def make_etag(value):
+    return '"%s"' % hashlib.md5(value.encode()).hexdigest()
+
+def is_not_modified(request, etag):
+    if_none_match = request.headers.get('If-None-Match')
+
+    return bool(if_none_match) and any(tag in [etag, '*'] for tag in parse_etags(if_none_match))
+
+def not_modified(etag):
+    response         = HttpResponseNotModified()
+    response['ETag'] = etag
+
+    return response
+
+def get_reviews(accommodation_id):
+    return Review.objects.filter(accommodation_id=accommodation_id).select_related('user')
+
+def serialize_review(review):
+    return {
+        'reviewid'   : review.id,
+        'userName'   : review.user.name,
+        'userProfile': review.user.profile_image,
+        'content'    : review.content,
+        'createdAt'  : DateFormat(review.created_at).format('Ym')
+    }
+
+def add_months(month, months):
+    month_index = month.year * 12 + month.month - 1 + months
+
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+def get_rating_summary(accommodation):
+    try:
+        return accommodation.rating_summary
+    except ObjectDoesNotExist:
+        return AccommodationRatingSummary(accommodation=accommodation)
+
 class AccommodationListView(View):
-    def get(self, request):         
-        checkin    = request.GET.get('checkin')
-        checkout   = request.GET.get('checkout')
-        guests     = request.GET.get('guests')
-        categories = request.GET.getlist('roomtype') 
-        price_min  = request.GET.get('min')
-        price_max  = request.GET.get('max')
-        limit      = int(request.GET.get('limit', '15'))
-        offset     = int(request.GET.get('offset', '15'))
-
-        condition = Q()
-        if (checkin and checkout):
-            condition.add((
-                ( 
-                    Q(unavailabledate__end_date__lte= datetime.strptime(checkin, "%Y-%m-%d").date()) 
-                )|(
-                    Q(unavailabledate__start_date__gte= datetime.strptime(checkout, "%Y-%m-%d").date())                    
-                )
-            ), Q.OR)
+    def get(self, request):
+        cache_key = get_search_cache_key(request.GET)
+        etag      = make_etag(cache_key)
 
-        if guests:
-            condition.add(Q(max_capacity__gt=guests), Q.AND)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
 
-        if len(categories):
-            category_dict = {
-                'entire'  : '집 전체',
-                'private' : '개인실',
-                'shared'  : '다인실',
-                'hotel'   : '호텔 객실'
-            }
-            categories = [category_dict[category] for category in categories]
+        content = search_cache.get(cache_key)
 
-            condition.add(Q(category__name__in=categories), Q.AND)
+        if content is None:
+            response = self.search(request)
+            if response.status_code != 200:
+                return response
 
-        if price_min:
-            condition.add(Q(price__gt=price_min), Q.AND)
-        if price_max:
-            condition.add(Q(price__lt=price_max), Q.AND)
-        
-        accommodations = Accommodation.objects.prefetch_related('image_set', 'review_set').select_related('category').filter(condition).distinct()
+            content = response.content
+            search_cache.set(cache_key, content)
+
+        response         = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+
+        return response
+
+    def search(self, request):
+        cursor     = request.GET.get('cursor')
+        count_mode = request.GET.get('count')
+
+        try:
+            limit  = int(request.GET.get('limit', SEARCH_PAGE_SIZE))
+            offset = int(request.GET.get('offset', limit))
+        except ValueError:
+            return JsonResponse({'message': 'INVALID_LIMIT'}, status=400)
+
+        if limit < 1:
+            return JsonResponse({'message': 'INVALID_LIMIT'}, status=400)
+
+        if offset < limit:
+            return JsonResponse({'message': 'INVALID_OFFSET'}, status=400)
+
+        try:
+            queryset   = filter_accommodations(request.GET)
+            sort_field = get_sort_field(request.GET)
+        except ValueError as error:
+            if str(error) not in SEARCH_ERRORS:
+                raise
+
+            return JsonResponse({'message': str(error)}, status=400)
+
+        accommodations = queryset.select_related('category', 'rating_summary').order_by(*get_ordering(sort_field))
         
-        index = math.ceil(len(accommodations)/limit)
-        accommodations = accommodations[offset-limit:offset]
+        if cursor is not None:
+            try:
+                accommodations, next_cursor = paginate_by_cursor(accommodations, cursor, min(limit, MAX_SEARCH_PAGE_SIZE), sort_field)
+            except ValueError:
+                return JsonResponse({'message': 'INVALID_CURSOR'}, status=400)
+        else:
+            index          = math.ceil(accommodations.count()/limit)
+            accommodations = list(accommodations[offset-limit:offset])
+
+        galleries = Image.objects.get_galleries([accommodation.id for accommodation in accommodations], SEARCH_GALLERY_SIZE)
 
         data = [
             {
             'id'       : accommodation.id,
-            'img'      : [image.image_url for image in accommodation.image_set.all()],
+            'img'      : galleries[accommodation.id],
             'location' : accommodation.address.split(' ')[1] + ' ' + accommodation.category.name,
             'title'    : accommodation.title,
             'MaxNum'   : accommodation.max_capacity,
-            'grade'    : str(round(mean(accommodation.review_set.all().aggregate(
-                Avg('clean_rate'),
-                Avg('communication_rate'),
-                Avg('checkin_rate'),
-                Avg('accuracy_rate'),
-                Avg('location_rate'),
-                Avg('value_rate')).values()), 2)) 
-                if accommodation.review_set.exists() else '0',
-            'gradeNum' : accommodation.review_set.count(),
+            'grade'    : str(get_rating_summary(accommodation).get_grade()),
+            'gradeNum' : get_rating_summary(accommodation).review_count,
             'price'    : round(accommodation.price, 0),
             'lat'      : accommodation.latitude,
             'long'     : accommodation.longitude,
@@ -94,55 +160,141 @@ class AccommodationListView(View):
             }
         for accommodation in accommodations]
 
-        return JsonResponse({'message': 'SUCCESS', 'data': data, 'index': index}, status=200)
+        if cursor is None:
+            return JsonResponse({'message': 'SUCCESS', 'data': data, 'index': index}, status=200)
+
+        results = {'message': 'SUCCESS', 'data': data, 'next': next_cursor}
+
+        if count_mode == 'exact':
+            results['count'] = queryset.count()
+        elif count_mode == 'estimate':
+            results['count'] = get_estimated_count(queryset)
+
+        return JsonResponse(results, status=200)
 
     @login_decorator
     def post(self, request):
         try:
             data = json.loads(request.body)
 
-            new_accommodation = Accommodation.objects.create(
-                category           = Category.objects.get(name=data['roomType']),
-                user               = request.user,
-                title              = data['title'],
-                address            = data['address'],
-                latitude           = data['lat'],
-                longitude          = data['long'],
-                description        = data['description'],
-                max_capacity       = data['maxPeople'],
-                price              = data['onedayPrice'],
-                cleaning_fee       = data['cleaningFee'],
-                number_of_bed      = data['beds'],
-                number_of_bedroom  = data['bedrooms'],
-                number_of_bathroom = data['bathrooms']
-            )
+            unavailable_dates = coalesce_ranges([(
+                datetime.strptime(unavailable_date['start_date'], '%Y-%m-%d').date(),
+                datetime.strptime(unavailable_date['end_date'], '%Y-%m-%d').date()
+            ) for unavailable_date in data['unavailableDates']])
 
-            image_url_list = data['imgUrls']
-            for image_url in image_url_list:
-                Image.objects.create(
-                    accommodation = new_accommodation,
-                    image_url     = image_url
+            with transaction.atomic():
+                new_accommodation = Accommodation.objects.create(
+                    category           = Category.objects.get_by_name(data['roomType']),
+                    user               = request.user,
+                    title              = data['title'],
+                    address            = data['address'],
+                    latitude           = data['lat'],
+                    longitude          = data['long'],
+                    description        = data['description'],
+                    max_capacity       = data['maxPeople'],
+                    price              = data['onedayPrice'],
+                    cleaning_fee       = data['cleaningFee'],
+                    number_of_bed      = data['beds'],
+                    number_of_bedroom  = data['bedrooms'],
+                    number_of_bathroom = data['bathrooms'],
+                    cover_image_url    = data['imgUrls'][0] if data['imgUrls'] else ''
                 )
 
-            unavailable_dates_list = data['unavailableDates']
-            for unavailable_date in unavailable_dates_list:
-                start_date = datetime.strptime(unavailable_date['start_date'], '%Y-%m-%d').date()
-                end_date   = datetime.strptime(unavailable_date['end_date'], '%Y-%m-%d').date()
+                Image.objects.bulk_create([Image(
+                    accommodation = new_accommodation,
+                    image_url     = image_url,
+                    position      = position,
+                    is_cover      = position == 0
+                ) for position, image_url in enumerate(data['imgUrls'])])
 
-                UnavailableDate.objects.create(
+                UnavailableDate.objects.bulk_create([UnavailableDate(
                     accommodation = new_accommodation,
                     start_date    = start_date,
                     end_date      = end_date
-                )
+                ) for start_date, end_date in unavailable_dates])
 
             return JsonResponse({'message': 'SUCCESS'}, status=200)
 
         except KeyError:
             return JsonResponse({'message': 'KEY_ERROR'}, status=400)
 
+        except JSONDecodeError:
+            return JsonResponse({'message': 'JSON_DECODE_ERROR'}, status=400)
+
+        except ValueError:
+            return JsonResponse({'message': 'INVALID_DATE'}, status=400)
+
         except Category.DoesNotExist:
             return JsonResponse({'message': 'CATEGORY_DOES_NOT_EXIST'}, status=400)
 
+class AccommodationFacetView(View):
+    def get(self, request):
+        try:
+            categories  = [CATEGORY_NAMES[category] for category in request.GET.getlist('roomtype')]
+            price_min   = Decimal(request.GET['min']) if request.GET.get('min') else None
+            price_max   = Decimal(request.GET['max']) if request.GET.get('max') else None
+            bucket_size = int(request.GET.get('bucket', PRICE_BUCKET_SIZE))
+        except (KeyError, InvalidOperation, ValueError):
+            return JsonResponse({'message': 'INVALID_FILTER'}, status=400)
+
+        if bucket_size <= 0:
+            return JsonResponse({'message': 'INVALID_FILTER'}, status=400)
+
+        cache_key = get_search_cache_key(request.GET, prefix='facets', skip=FACET_SKIP_PARAMS)
+        rows      = search_cache.get(cache_key)
+
+        if rows is None:
+            try:
+                queryset = filter_accommodations(request.GET, skip=['roomtype', 'price'])
+            except ValueError as error:
+                if str(error) not in SEARCH_ERRORS:
+                    raise
+
+                return JsonResponse({'message': str(error)}, status=400)
+
+            rows = list(queryset.values_list('category__name', 'price').annotate(count=Count('id')).order_by())
+            search_cache.set(cache_key, rows)
+
+        category_keys   = {name: key for key, name in CATEGORY_NAMES.items()}
+        roomtype_counts = {key: 0 for key in CATEGORY_NAMES}
+        price_counts    = {}
+
+        if (price_min is not None or price_max is not None) and request.GET.get('checkin') and request.GET.get('checkout'):
+            roomtype_rows = self.get_stay_roomtype_rows(request)
+        else:
+            roomtype_rows = [
+                (category_name, count) for category_name, price, count in rows
+                if (price_min is None or price > price_min) and (price_max is None or price < price_max)
+            ]
+
+        for category_name, count in roomtype_rows:
+            if category_name in category_keys:
+                roomtype_counts[category_keys[category_name]] += count
+
+        for category_name, price, count in rows:
+            if not categories or category_name in categories:
+                bucket               = int(price // bucket_size) * bucket_size
+                price_counts[bucket] = price_counts.get(bucket, 0) + count
+
+        price_histogram = [{
+            'min'  : bucket,
+            'max'  : bucket + bucket_size,
+            'count': count
+        } for bucket, count in sorted(price_counts.items())]
+
+        return JsonResponse({'message': 'SUCCESS', 'roomtype': roomtype_counts, 'price': price_histogram}, status=200)
+
+    def get_stay_roomtype_rows(self, request):
+        cache_key = get_search_cache_key(request.GET, prefix='facet-roomtypes', skip=ROOMTYPE_FACET_SKIP)
+        rows      = search_cache.get(cache_key)
+
+        if rows is None:
+            queryset = filter_accommodations(request.GET, skip=['roomtype'])
+            rows     = list(queryset.values_list('category__name').annotate(count=Count('id')).order_by())
+            search_cache.set(cache_key, rows)
+
+        return rows
+
 class FileUploadView(View):
     def post(self, request):
         AWS_S3_CREDS = {
@@ -175,18 +327,23 @@ class FileUploadView(View):
 
 class AccomodationDetailView(View):
     def get(self, request, accommodation_id):
-        if not Accommodation.objects.filter(id=accommodation_id).exists():
+        if request.headers.get('If-None-Match'):
+            version = Accommodation.objects.filter(id=accommodation_id).values_list('version', flat=True).first()
+            etag    = make_etag(f'{accommodation_id}:{version}')
+
+            if version is not None and is_not_modified(request, etag):
+                return not_modified(etag)
+
+        accommodation = Accommodation.objects.select_related('user', 'category', 'rating_summary').prefetch_related(
+            Prefetch('image_set', queryset=Image.objects.order_by(*IMAGE_ORDERING))
+        ).filter(id=accommodation_id).first()
+
+        if not accommodation:
             return JsonResponse({"message": "PAGE_NOT_FOUND"}, status=404)
 
-        accommodation = Accommodation.objects.select_related('user', 'category').prefetch_related('review_set').get(id=accommodation_id)
-        review_avg    = accommodation.review_set.aggregate(
-                            clean_avg         = Coalesce(Avg('clean_rate'), 0),
-                            accuracy_avg      = Coalesce(Avg('accuracy_rate'), 0),
-                            communication_avg = Coalesce(Avg('communication_rate'), 0),
-                            location_avg      = Coalesce(Avg('location_rate'), 0),
-                            checkin_avg       = Coalesce(Avg('checkin_rate'), 0),
-                            value_avg         = Coalesce(Avg('value_rate'), 0),
-                        )
+        images               = [image.image_url for image in accommodation.image_set.all()]
+        rating_summary       = get_rating_summary(accommodation)
+        reviews, next_cursor = paginate_by_cursor(get_reviews(accommodation_id), '', REVIEW_PAGE_SIZE, 'created_at')
         
         data = {
             'id'         : accommodation.id,
@@ -194,8 +351,8 @@ class AccomodationDetailView(View):
             'address'    : accommodation.address,
             'lat'        : accommodation.latitude,
             'long'       : accommodation.longitude,
-            'firstImg'   : accommodation.image_set.first().image_url,
-            'img'        : [image.image_url for image in accommodation.image_set.all()[1:]],
+            'firstImg'   : images[0] if images else None,
+            'img'        : images[1:],
             'description': accommodation.description,
             'onedayPrice': accommodation.price,
             'cleaningFee': accommodation.cleaning_fee,
@@ -209,21 +366,76 @@ class AccomodationDetailView(View):
             'beds'       : accommodation.number_of_bed, 
             'bedrooms'   : accommodation.number_of_bedroom, 
             'bathrooms'  : accommodation.number_of_bathroom,
-            'totalCount' : accommodation.review_set.count(),
-            'totalAvg'   : round(mean(review_avg.values()), 2),
+            'totalCount' : rating_summary.review_count,
+            'totalAvg'   : rating_summary.get_grade(),
             'grade'      : [{
                 'average'   : round(each_average, 1),
                 'gradeValue': round(each_average * 100 / 5)
-            } for each_average in review_avg.values()],
-            'comment'    : [{
-                'reviewid'   : review.id,
-                'userName'   : review.user.name,
-                'userProfile': review.user.profile_image,
-                'content'    : review.content,
-                'createdAt'  : DateFormat(review.created_at).format('Ym')
-            } for review in accommodation.review_set.all()]
+            } for each_average in rating_summary.get_averages()],
+            'comment'    : [serialize_review(review) for review in reviews],
+            'commentNext': next_cursor
         }
 
-        return JsonResponse(data, status=200)
+        response         = JsonResponse(data, status=200)
+        response['ETag'] = make_etag(f'{accommodation.id}:{accommodation.version}')
+
+        return response
+
+class AccommodationReviewView(View):
+    def get(self, request, accommodation_id):
+        cursor = request.GET.get('cursor', '')
+
+        try:
+            limit = min(max(int(request.GET.get('limit', REVIEW_PAGE_SIZE)), 1), MAX_REVIEW_PAGE_SIZE)
+        except ValueError:
+            return JsonResponse({'message': 'INVALID_LIMIT'}, status=400)
+
+        try:
+            reviews, next_cursor = paginate_by_cursor(get_reviews(accommodation_id), cursor, limit, 'created_at')
+        except ValueError:
+            return JsonResponse({'message': 'INVALID_CURSOR'}, status=400)
+
+        if not reviews and not Accommodation.objects.filter(id=accommodation_id).exists():
+            return JsonResponse({"message": "PAGE_NOT_FOUND"}, status=404)
+
+        return JsonResponse({
+            'message': 'SUCCESS',
+            'comment': [serialize_review(review) for review in reviews],
+            'next'   : next_cursor
+        }, status=200)
+
+class AccommodationCalendarView(View):
+    def get(self, request, accommodation_id):
+        try:
+            start  = datetime.strptime(request.GET['from'], '%Y-%m').date() if request.GET.get('from') else date.today().replace(day=1)
+            months = int(request.GET.get('months', CALENDAR_MONTHS))
+        except ValueError:
+            return JsonResponse({'message': 'INVALID_DATE'}, status=400)
+
+        if not 0 < months <= MAX_CALENDAR_MONTHS:
+            return JsonResponse({'message': 'INVALID_MONTHS'}, status=400)
+
+        try:
+            month_starts = [add_months(start, month) for month in range(months + 1)]
+        except ValueError:
+            return JsonResponse({'message': 'INVALID_DATE'}, status=400)
+
+        version = Accommodation.objects.filter(id=accommodation_id).values_list('version', flat=True).first()
+
+        if version is None:
+            return JsonResponse({"message": "PAGE_NOT_FOUND"}, status=404)
+
+        cache_key = f'calendar:{accommodation_id}:{version}:{start}:{months}'
+        calendar  = cache.get(cache_key)
+
+        if calendar is None:
+            blocked_days = get_blocked_days(accommodation_id, month_starts[0], month_starts[-1])
+
+            calendar = [{
+                'month': month_start.strftime('%Y-%m'),
+                'days' : blocked_days[(month_start - start).days:(month_end - start).days]
+            } for month_start, month_end in zip(month_starts, month_starts[1:])]
 
+            cache.set(cache_key, calendar, CALENDAR_CACHE_TIME)
 
+        return JsonResponse({'message': 'SUCCESS', 'calendar': calendar}, status=200)
@@ -84,6 +84,46 @@ DATABASES = {
         'PORT': os.environ.get('DB_PORT')
     }
 }
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+# 'search' only holds serialized pages; the version that invalidates them is the search_versions row,
+# so writes from any process or management command are seen by every web worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'search': {
+        'BACKEND' : os.environ.get('SEARCH_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('SEARCH_CACHE_LOCATION', 'search'),
+        'TIMEOUT' : 60 * 10,
+        'OPTIONS' : {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+}
+
+# Reservations
+# Seconds a purchase Idempotency-Key is remembered before it can be reused
+
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+
+# 'sync' books inside the request, 'async' queues a booking intent for run_booking_worker
+
+BOOKING_MODE = os.environ.get('BOOKING_MODE', 'sync')
+
+# Login
+# Users resolved by login_decorator are kept in a per-process LRU for LOGIN_USER_CACHE_TTL seconds,
+# and also in the LOGIN_USER_CACHE_ALIAS cache when it is set. Saving a user drops both entries.
+# LOGIN_TRUST_TOKEN_CLAIMS signs the user's claims into access tokens that expire after
+# LOGIN_TOKEN_CLAIMS_TTL seconds, and builds request.user from them without a lookup.
+
+LOGIN_USER_CACHE_SIZE    = 1024
+LOGIN_USER_CACHE_TTL     = 60
+LOGIN_USER_CACHE_ALIAS   = os.environ.get('LOGIN_USER_CACHE_ALIAS')
+LOGIN_TRUST_TOKEN_CLAIMS = os.environ.get('LOGIN_TRUST_TOKEN_CLAIMS') == 'true'
+LOGIN_TOKEN_CLAIMS_TTL   = 60 * 15
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
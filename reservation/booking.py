@@ -0,0 +1,132 @@
+from datetime                   import timedelta
+from concurrent.futures         import ThreadPoolExecutor
+
+from django.db                  import connection, transaction, DatabaseError
+from django.db.models           import Q
+from django.db.models.functions import Mod
+from django.utils               import timezone
+
+from reservation.models         import Reservation, BookingIntent
+from accommodation.models       import Accommodation
+from accommodation.availability import get_availability_condition, STATUS_BOOKED
+from accommodation.pricing      import quote_stays
+
+BOOKING_BATCH_SIZE    = 100
+MAX_BOOKING_ATTEMPTS  = 3
+BOOKING_CLAIM_TIMEOUT = timedelta(minutes=5)
+
+def book(user_id, accommodation_id, start_date, end_date, total_price, total_guest):
+    with transaction.atomic():
+        (quote, error), = quote_stays(
+            [(accommodation_id, start_date, end_date, total_guest)], Accommodation.objects.select_for_update()
+        )
+
+        if error:
+            return error, quote, None
+
+        if total_price != quote:
+            return 'INVALID_PRICE', quote, None
+
+        is_available = Accommodation.objects.filter(
+            get_availability_condition(start_date, end_date),
+            id = accommodation_id
+        ).exists()
+
+        if not is_available:
+            return 'RESERVATION_CONFLICT', quote, None
+
+        reservation = Reservation.objects.create(
+            accommodation_id = accommodation_id,
+            user_id          = user_id,
+            start_date       = start_date,
+            end_date         = end_date,
+            total_price      = total_price,
+            total_guest      = total_guest,
+            status_id        = STATUS_BOOKED
+        )
+
+    return None, quote, reservation
+
+def finish_intent(intent, status, message='', reservation=None):
+    BookingIntent.objects.filter(id=intent.id, status=BookingIntent.PROCESSING, attempts=intent.attempts).update(
+        status       = status,
+        message      = message,
+        reservation  = reservation,
+        processed_at = timezone.now()
+    )
+
+def process_intent(intent):
+    attempts = intent.attempts + 1
+
+    if not BookingIntent.objects.filter(id=intent.id, status=BookingIntent.QUEUED, attempts=intent.attempts).update(
+        status     = BookingIntent.PROCESSING,
+        attempts   = attempts,
+        claimed_at = timezone.now()
+    ):
+        return False
+
+    intent.attempts = attempts
+
+    try:
+        error, quote, reservation = book(
+            intent.user_id, intent.accommodation_id, intent.start_date, intent.end_date, intent.total_price, intent.total_guest
+        )
+    except DatabaseError:
+        if attempts >= MAX_BOOKING_ATTEMPTS:
+            finish_intent(intent, BookingIntent.REJECTED, 'BOOKING_FAILED')
+            return True
+
+        BookingIntent.objects.filter(id=intent.id, status=BookingIntent.PROCESSING, attempts=attempts).update(
+            status     = BookingIntent.QUEUED,
+            claimed_at = None
+        )
+        return False
+
+    if error:
+        finish_intent(intent, BookingIntent.REJECTED, error)
+    else:
+        finish_intent(intent, BookingIntent.BOOKED, reservation=reservation)
+
+    return True
+
+def reclaim_stale_intents(timeout=BOOKING_CLAIM_TIMEOUT):
+    stale_intents = BookingIntent.objects.filter(
+        Q(claimed_at__lt=timezone.now() - timeout) | Q(claimed_at__isnull=True),
+        status = BookingIntent.PROCESSING
+    )
+
+    rejected = stale_intents.filter(attempts__gte=MAX_BOOKING_ATTEMPTS).update(
+        status       = BookingIntent.REJECTED,
+        message      = 'BOOKING_FAILED',
+        processed_at = timezone.now()
+    )
+    requeued = stale_intents.update(status=BookingIntent.QUEUED, claimed_at=None)
+
+    return rejected + requeued
+
+def drain_partition(partition, partitions, batch_size=BOOKING_BATCH_SIZE):
+    processed = 0
+    while True:
+        intents = list(BookingIntent.objects.annotate(
+            partition = Mod('accommodation_id', partitions)
+        ).filter(status=BookingIntent.QUEUED, partition=partition).order_by('id')[:batch_size])
+
+        if not intents:
+            return processed
+
+        processed += sum(process_intent(intent) for intent in intents)
+
+def drain_in_thread(partition, partitions, batch_size):
+    try:
+        return drain_partition(partition, partitions, batch_size)
+    finally:
+        connection.close()
+
+def drain_queue(workers, batch_size=BOOKING_BATCH_SIZE):
+    reclaim_stale_intents()
+
+    if workers == 1:
+        return drain_partition(0, 1, batch_size)
+
+    with ThreadPoolExecutor(workers) as executor:
+        return sum(executor.map(drain_in_thread, range(workers), [workers] * workers, [batch_size] * workers))
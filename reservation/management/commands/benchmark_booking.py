@@ -0,0 +1,108 @@
+import time
+import random
+
+from datetime                    import date, timedelta
+from decimal                     import Decimal
+from concurrent.futures          import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db                   import connection
+
+from user.models                 import User, SocialPlatform
+from reservation.models          import Reservation, ReservationStatus, BookingIntent
+from reservation.booking         import book, drain_queue
+from accommodation.models        import Accommodation, Category
+from accommodation.availability  import HORIZON_DAYS, STATUS_PENDING, STATUS_BOOKED
+
+PRICE = Decimal('50000.00')
+
+def book_in_thread(user_id, stay):
+    try:
+        return book(user_id, *stay)
+    finally:
+        connection.close()
+
+class Command(BaseCommand):
+    help = 'Compare sustained bookings per second of synchronous purchases against the queued booking worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listings', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--clients', type=int, default=8, help='Concurrent web workers booking synchronously')
+        parser.add_argument('--workers', type=int, default=4, help='Booking worker threads draining the queue')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+
+        user, category = self.seed(options['listings'])
+        try:
+            stays = self.make_stays(category, options['requests'])
+
+            self.stdout.write(f'{"mode":<8}{"seconds":>10}{"bookings/s":>12}{"booked":>8}')
+
+            started_at = time.perf_counter()
+            if options['clients'] == 1:
+                results = [book(user.id, *stay) for stay in stays]
+            else:
+                with ThreadPoolExecutor(options['clients']) as executor:
+                    results = list(executor.map(book_in_thread, [user.id] * len(stays), stays))
+            self.report('sync', time.perf_counter() - started_at, len(stays), sum(error is None for error, _, _ in results))
+
+            Reservation.objects.filter(user=user).delete()
+
+            started_at = time.perf_counter()
+            BookingIntent.objects.bulk_create([BookingIntent(
+                user             = user,
+                accommodation_id = accommodation_id,
+                start_date       = start_date,
+                end_date         = end_date,
+                total_price      = total_price,
+                total_guest      = total_guest
+            ) for accommodation_id, start_date, end_date, total_price, total_guest in stays], batch_size=1000)
+            drain_queue(options['workers'])
+            self.report('async', time.perf_counter() - started_at, len(stays), BookingIntent.objects.filter(user=user, status=BookingIntent.BOOKED).count())
+
+        finally:
+            Accommodation.objects.filter(category=category).delete()
+            category.delete()
+            user.delete()
+
+    def report(self, mode, seconds, requests, booked):
+        self.stdout.write(f'{mode:<8}{seconds:>10.2f}{requests / seconds:>12.1f}{booked:>8}')
+
+    def make_stays(self, category, requests):
+        accommodation_ids = list(Accommodation.objects.filter(category=category).values_list('id', flat=True))
+
+        stays = []
+        for index in range(requests):
+            start_date = date.today() + timedelta(days=self.random.randrange(HORIZON_DAYS - 7))
+            nights     = self.random.randint(1, 3)
+            stays.append((self.random.choice(accommodation_ids), start_date, start_date + timedelta(days=nights), PRICE * nights, 1))
+
+        return stays
+
+    def seed(self, listings):
+        social_platform = SocialPlatform.objects.get_or_create(name='benchmark')[0]
+        ReservationStatus.objects.get_or_create(code=STATUS_PENDING, defaults={'name': 'pending'})
+        ReservationStatus.objects.get_or_create(code=STATUS_BOOKED, defaults={'name': 'booked'})
+
+        user     = User.objects.create(email='booking-benchmark@ourbnb.com', name='benchmark', profile_image='', social_platform=social_platform)
+        category = Category.objects.create(name='booking benchmark', description='benchmark')
+
+        Accommodation.objects.bulk_create([Accommodation(
+            category           = category,
+            user               = user,
+            title              = f'benchmark {index}',
+            address            = '서울특별시 강남구 테헤란로',
+            latitude           = 37.5,
+            longitude          = 127.05,
+            description        = '',
+            max_capacity       = 4,
+            price              = PRICE,
+            number_of_bed      = 1,
+            number_of_bedroom  = 1,
+            number_of_bathroom = 1
+        ) for index in range(listings)])
+
+        return user, category
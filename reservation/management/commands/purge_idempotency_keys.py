@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils                import timezone
+
+from reservation.models          import IdempotencyKey
+
+class Command(BaseCommand):
+    help = 'Delete purchase idempotency keys whose TTL has expired'
+
+    def handle(self, *args, **options):
+        count, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+
+        self.stdout.write(self.style.SUCCESS(f'{count} expired idempotency keys purged'))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db                   import DatabaseError
+
+from reservation.booking         import drain_queue, BOOKING_BATCH_SIZE
+
+class Command(BaseCommand):
+    help = 'Apply queued booking intents, serially per accommodation and in parallel across accommodations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Worker threads, each owning a partition of accommodations')
+        parser.add_argument('--batch-size', type=int, default=BOOKING_BATCH_SIZE)
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                try:
+                    processed = drain_queue(options['workers'], options['batch_size'])
+                except DatabaseError as error:
+                    if options['once']:
+                        raise
+
+                    self.stderr.write(f'Booking drain failed: {error}')
+                    processed = 0
+
+                if processed:
+                    self.stdout.write(f'{processed} booking intents processed')
+
+                if options['once']:
+                    break
+
+                if not processed:
+                    time.sleep(options['poll_interval'])
+
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('Booking worker stopped'))
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['accommodation', 'status', 'start_date', 'end_date'], name='reservation_accommo_0a5958_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation', '0010_image_position_cover'),
+        ('user', '0001_initial'),
+        ('reservation', '0003_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingIntent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total_guest', models.IntegerField()),
+                ('status', models.CharField(default='queued', max_length=20)),
+                ('message', models.CharField(default='', max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(null=True)),
+                ('accommodation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accommodation.accommodation')),
+                ('reservation', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='reservation.reservation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='user.user')),
+            ],
+            options={
+                'db_table': 'booking_intents',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bookingintent',
+            index=models.Index(fields=['status', 'accommodation', 'id'], name='booking_int_status_0a70ef_idx'),
+        ),
+    ]
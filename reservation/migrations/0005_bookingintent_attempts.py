@@ -0,0 +1,23 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservation', '0004_bookingintent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookingintent',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bookingintent',
+            name='claimed_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -15,10 +15,49 @@ class Reservation(models.Model):
 
     class Meta:
         db_table = 'reservations'
+        indexes  = [models.Index(fields=['accommodation', 'status', 'start_date', 'end_date'])]
 
 class ReservationStatus(models.Model):    
     code = models.IntegerField(primary_key=True)
     name = models.CharField(max_length=20)
 
     class Meta:
-        db_table = 'reservation_status'
\ No newline at end of file
+        db_table = 'reservation_status'
+
+class IdempotencyKey(models.Model):
+    user          = models.ForeignKey('user.User', on_delete=models.CASCADE)
+    key           = models.CharField(max_length=255)
+    request_hash  = models.CharField(max_length=64)
+    reservation   = models.ForeignKey('Reservation', on_delete=models.SET_NULL, null=True)
+    status_code   = models.IntegerField(null=True)
+    response_body = models.TextField(default='')
+    created_at    = models.DateTimeField(auto_now_add=True)
+    expires_at    = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table    = 'idempotency_keys'
+        constraints = [models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key')]
+
+class BookingIntent(models.Model):
+    QUEUED     = 'queued'
+    PROCESSING = 'processing'
+    BOOKED     = 'booked'
+    REJECTED   = 'rejected'
+
+    user          = models.ForeignKey('user.User', on_delete=models.CASCADE)
+    accommodation = models.ForeignKey('accommodation.Accommodation', on_delete=models.CASCADE)
+    start_date    = models.DateField()
+    end_date      = models.DateField()
+    total_price   = models.DecimalField(max_digits=10, decimal_places=2)
+    total_guest   = models.IntegerField()
+    status        = models.CharField(max_length=20, default=QUEUED)
+    message       = models.CharField(max_length=50, default='')
+    reservation   = models.ForeignKey('Reservation', on_delete=models.SET_NULL, null=True)
+    attempts      = models.IntegerField(default=0)
+    created_at    = models.DateTimeField(auto_now_add=True)
+    claimed_at    = models.DateTimeField(null=True)
+    processed_at  = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = 'booking_intents'
+        indexes  = [models.Index(fields=['status', 'accommodation', 'id'])]
@@ -1,14 +1,45 @@
+import sys
 import json
 import jwt
-from datetime               import date
+import time
+import base64
+from datetime               import date, timedelta
+from io                     import StringIO
+from concurrent.futures     import ThreadPoolExecutor
+from unittest.mock          import patch
 
-from django.test            import Client, TestCase
+from django.test            import Client, TestCase, TransactionTestCase, skipUnlessDBFeature, override_settings
+from django.db              import connection, OperationalError
+from django.utils           import timezone
+from django.core.management import call_command
 
 from user.models            import User, SocialPlatform
-from reservation.models     import Reservation, ReservationStatus
-from accommodation.models   import Accommodation, Category, Image
+from reservation.models     import Reservation, ReservationStatus, IdempotencyKey, BookingIntent
+from reservation.booking    import book, MAX_BOOKING_ATTEMPTS
+from accommodation.models   import Accommodation, Category, Image, UnavailableDate, PriceOverride
 from my_settings            import ALGORITHM, SECRET_KEY
 
+def post_purchase(start_date, end_date, accommodation_id=1, total_price=11000, idempotency_key=None, total_guest=1):
+    client          = Client()
+    access_token    = jwt.encode({'user':1}, SECRET_KEY, ALGORITHM)
+    headers         = {'HTTP_AUTHORIZATION':access_token}
+
+    if idempotency_key:
+        headers['HTTP_IDEMPOTENCY_KEY'] = idempotency_key
+
+    return client.post(
+        '/reservation/purchase',
+        data={
+            'accommodation_id'  : accommodation_id,
+            'start_date'        : start_date,
+            'end_date'          : end_date,
+            'total_price'       : total_price,
+            'total_guest'       : total_guest,
+        },
+        content_type='application/json',
+        **headers
+    )
+
 class ReservationListViewTest(TestCase):
     def setUp(self):
         SocialPlatform.objects.create(
@@ -166,7 +197,8 @@ class ReservationListViewTest(TestCase):
                         'startDate'            : '2021-04-19',
                         'thumbnailImage'       : 'house_image.jpg'
                 }]
-            }
+            },
+            'next': {'upcoming': None, 'past': None, 'canceled': None}
         })
     
     def test_reservation_list_get_sucess_without_reservation(self):
@@ -262,7 +294,7 @@ class ReservationListViewTest(TestCase):
                 'accommodation_id'  : 1,
                 'start_date'        : '2021-04-25',
                 'end_date'          : '2021-04-26',
-                'total_price'       : 10000,
+                'total_price'       : 11000,
                 'total_guest'       : 1,
             },
             content_type='application/json',
@@ -286,3 +318,395 @@ class ReservationListViewTest(TestCase):
         )
 
         self.assertEqual(response.status_code, 400)
+
+    def test_purchase_fail_overlapping_reservation(self):
+        self.assertEqual(post_purchase('2021-04-25', '2021-04-28', total_price=31000).status_code, 200)
+        self.assertEqual(post_purchase('2021-04-27', '2021-04-29', total_price=21000).status_code, 409)
+        self.assertEqual(post_purchase('2021-04-28', '2021-04-29').status_code, 200)
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_purchase_fail_unavailable_date(self):
+        UnavailableDate.objects.create(accommodation_id=1, start_date='2021-04-20', end_date='2021-04-26')
+
+        response = post_purchase('2021-04-25', '2021-04-26')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'message': 'RESERVATION_CONFLICT'})
+
+    def test_purchase_fail_invalid_date(self):
+        self.assertEqual(post_purchase('2021-04-26', '2021-04-26').status_code, 400)
+        self.assertEqual(post_purchase('2021-04-26', 'tomorrow').status_code, 400)
+        self.assertEqual(post_purchase('2021-04-25', '2021-04-26', 9).status_code, 404)
+
+    def test_purchase_accepts_string_ids_and_rejects_invalid_guests(self):
+        self.assertEqual(post_purchase('2021-04-25', '2021-04-26', accommodation_id='1').status_code, 200)
+
+        with self.settings(BOOKING_MODE='async'):
+            self.assertEqual(post_purchase('2021-04-26', '2021-04-27', accommodation_id='1').status_code, 202)
+
+        response = post_purchase('2021-04-27', '2021-04-28', total_guest='many')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message': 'INVALID_GUESTS'})
+
+    def test_purchase_fail_invalid_price(self):
+        response = post_purchase('2021-04-25', '2021-04-27', total_price=11000)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message': 'INVALID_PRICE', 'totalPrice': '21000.00'})
+        self.assertEqual(post_purchase('2021-04-25', '2021-04-27', total_price='21000.00').status_code, 200)
+
+    def test_purchase_idempotent_replay(self):
+        first  = post_purchase('2021-04-25', '2021-04-26', idempotency_key='retry-1')
+        second = post_purchase('2021-04-25', '2021-04-26', idempotency_key='retry-1')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.get(key='retry-1').reservation_id, first.json()['reservationId'])
+
+    def test_purchase_idempotency_key_reused_with_other_body(self):
+        post_purchase('2021-04-25', '2021-04-26', idempotency_key='retry-1')
+        response = post_purchase('2021-04-27', '2021-04-28', idempotency_key='retry-1')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_purchase_idempotency_key_expires(self):
+        post_purchase('2021-04-25', '2021-04-26', idempotency_key='retry-1')
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('1 expired idempotency keys purged', out.getvalue())
+
+        response = post_purchase('2021-04-25', '2021-04-26', idempotency_key='retry-1')
+        self.assertEqual(response.status_code, 409)
+
+    @override_settings(BOOKING_MODE='async')
+    def test_purchase_queued_for_booking_worker(self):
+        client       = Client()
+        access_token = jwt.encode({'user':1}, SECRET_KEY, ALGORITHM)
+
+        first  = post_purchase('2021-04-25', '2021-04-27', total_price=21000)
+        second = post_purchase('2021-04-26', '2021-04-28', total_price=21000)
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(Reservation.objects.count(), 0)
+
+        response = client.get(f'/reservation/bookings/{first.json()["bookingId"]}', HTTP_AUTHORIZATION=access_token)
+        self.assertEqual(response.json()['status'], 'queued')
+
+        out = StringIO()
+        call_command('run_booking_worker', '--once', '--workers', '1', stdout=out)
+        self.assertIn('2 booking intents processed', out.getvalue())
+
+        response = client.get(f'/reservation/bookings/{first.json()["bookingId"]}', HTTP_AUTHORIZATION=access_token)
+        self.assertEqual(response.json()['status'], 'booked')
+        self.assertEqual(response.json()['reservationId'], Reservation.objects.get().id)
+
+        response = client.get(f'/reservation/bookings/{second.json()["bookingId"]}', HTTP_AUTHORIZATION=access_token)
+        self.assertEqual((response.json()['status'], response.json()['result']), ('rejected', 'RESERVATION_CONFLICT'))
+
+        self.assertEqual(post_purchase('2021-04-25', '2021-04-27').status_code, 400)
+        self.assertEqual(client.get('/reservation/bookings/999', HTTP_AUTHORIZATION=access_token).status_code, 404)
+
+    @override_settings(BOOKING_MODE='async')
+    def test_booking_worker_retries_database_errors(self):
+        first  = post_purchase('2021-04-25', '2021-04-27', total_price=21000).json()['bookingId']
+        second = post_purchase('2021-05-25', '2021-05-27', total_price=21000).json()['bookingId']
+        calls  = []
+
+        def flaky_book(user_id, accommodation_id, start_date, *args):
+            calls.append(start_date)
+            if start_date == date(2021, 5, 25) or calls.count(start_date) == 1:
+                raise OperationalError('Lock wait timeout exceeded')
+
+            return book(user_id, accommodation_id, start_date, *args)
+
+        with patch('reservation.booking.book', side_effect=flaky_book):
+            call_command('run_booking_worker', '--once', '--workers', '1', stdout=StringIO())
+
+        self.assertEqual(
+            list(BookingIntent.objects.order_by('id').values_list('id', 'status', 'message', 'attempts')),
+            [(first, 'booked', '', 2), (second, 'rejected', 'BOOKING_FAILED', MAX_BOOKING_ATTEMPTS)]
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    @override_settings(BOOKING_MODE='async')
+    def test_booking_worker_reclaims_stale_intents(self):
+        intent_ids = [
+            post_purchase(f'2021-0{month}-25', f'2021-0{month}-26').json()['bookingId'] for month in [4, 5, 6]
+        ]
+        stale_at   = timezone.now() - timedelta(hours=1)
+
+        BookingIntent.objects.filter(id=intent_ids[0]).update(status='processing', attempts=1, claimed_at=stale_at)
+        BookingIntent.objects.filter(id=intent_ids[1]).update(status='processing', attempts=MAX_BOOKING_ATTEMPTS, claimed_at=stale_at)
+        BookingIntent.objects.filter(id=intent_ids[2]).update(status='processing', attempts=1, claimed_at=timezone.now())
+
+        call_command('run_booking_worker', '--once', '--workers', '1', stdout=StringIO())
+
+        self.assertEqual(
+            list(BookingIntent.objects.order_by('id').values_list('status', 'message')),
+            [('booked', ''), ('rejected', 'BOOKING_FAILED'), ('processing', '')]
+        )
+
+    def test_benchmark_booking_cleans_up(self):
+        out = StringIO()
+        call_command('benchmark_booking', '--listings', '3', '--requests', '20', '--clients', '1', '--workers', '1', stdout=out)
+
+        self.assertIn('async', out.getvalue())
+        self.assertEqual(Accommodation.objects.count(), 1)
+        self.assertEqual(Reservation.objects.count(), 0)
+
+    def test_quote_batch(self):
+        client = Client()
+        stays  = [{
+            'accommodation_id': 1,
+            'checkin'         : '2021-05-01',
+            'checkout'        : f'2021-05-{nights + 1:02d}',
+            'guests'          : 2
+        } for nights in range(1, 11)] * 30
+        stays += [
+            {'accommodation_id': 1, 'checkin': '2021-05-01', 'checkout': '2021-05-02', 'guests': 6},
+            {'accommodation_id': 9, 'checkin': '2021-05-01', 'checkout': '2021-05-02'},
+        ]
+
+        with self.assertNumQueries(1):
+            response = client.post('/reservation/quote', {'stays': stays}, content_type='application/json')
+
+        quotes = response.json()['quotes']
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(quotes), 302)
+        self.assertEqual([quote['totalPrice'] for quote in quotes[:3]], ['11000.00', '21000.00', '31000.00'])
+        self.assertEqual([quote['message'] for quote in quotes[-2:]], ['INVALID_GUESTS', 'PAGE_NOT_FOUND'])
+
+    def test_quote_with_price_override(self):
+        client  = Client()
+        checkin = date.today() + timedelta(days=10)
+        PriceOverride.objects.create(accommodation_id=1, start_date=checkin + timedelta(days=1), end_date=checkin + timedelta(days=3), price=25000)
+
+        stays = [
+            {'accommodation_id': 1, 'checkin': f'{checkin}', 'checkout': f'{checkin + timedelta(days=4)}'},
+            {'accommodation_id': 1, 'checkin': f'{checkin + timedelta(days=3)}', 'checkout': f'{checkin + timedelta(days=5)}'},
+        ]
+        response = client.post('/reservation/quote', {'stays': stays}, content_type='application/json')
+
+        self.assertEqual([quote['totalPrice'] for quote in response.json()['quotes']], ['71000.00', '21000.00'])
+
+        Accommodation.objects.filter(id=1).update(price=20000)
+        Accommodation.objects.get(id=1).save()
+        response = client.post('/reservation/quote', {'stays': stays}, content_type='application/json')
+
+        self.assertEqual([quote['totalPrice'] for quote in response.json()['quotes']], ['91000.00', '41000.00'])
+
+        PriceOverride.objects.all().delete()
+        response = client.post('/reservation/quote', {'stays': stays}, content_type='application/json')
+
+        self.assertEqual([quote['totalPrice'] for quote in response.json()['quotes']], ['81000.00', '41000.00'])
+
+    def test_quote_fail(self):
+        client = Client()
+        stay   = {'accommodation_id': 1, 'checkin': '2021-05-02', 'checkout': '2021-05-01'}
+
+        self.assertEqual(client.post('/reservation/quote', {'stays': [stay]}, content_type='application/json').status_code, 400)
+        self.assertEqual(client.post('/reservation/quote', {'stays': [stay] * 501}, content_type='application/json').status_code, 400)
+        self.assertEqual(client.post('/reservation/quote', {}, content_type='application/json').status_code, 400)
+
+class ReservationBucketTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        SocialPlatform.objects.create(id=1, name='kakao')
+        ReservationStatus.objects.create(code=1, name='pending')
+        ReservationStatus.objects.create(code=2, name='booked')
+        ReservationStatus.objects.create(code=3, name='canceled')
+
+        User.objects.create(
+            id                 = 1,
+            email              = 'test@gmail.com',
+            name               = 'test',
+            profile_image      = 'profile_image.jpg',
+            social_platform_id = 1
+        )
+
+        Category.objects.create(id=1, name='집 전체', description='집 전체를 사용하게 됩니다.')
+
+        for accommodation_id in [1, 2]:
+            Accommodation.objects.create(
+                id                  = accommodation_id,
+                category_id         = 1,
+                user_id             = 1,
+                title               = f'test house {accommodation_id}',
+                address             = '서울특별시 강남구 테헤란로',
+                latitude            = 37.5,
+                longitude           = 127.05,
+                description         = 'description',
+                max_capacity        = 5,
+                price               = 10000,
+                cleaning_fee        = 1000,
+                number_of_bed       = 1,
+                number_of_bedroom   = 1,
+                number_of_bathroom  = 1
+            )
+
+            for index in range(3):
+                Image.objects.create(accommodation_id=accommodation_id, image_url=f'house{accommodation_id}_{index}.jpg')
+
+    def create_reservations(self, count, days, status_id=2):
+        for index in range(count):
+            start_date = date.today() + timedelta(days=days + index * 3)
+            Reservation.objects.create(
+                accommodation_id = index % 2 + 1,
+                user_id          = 1,
+                start_date       = start_date,
+                end_date         = start_date + timedelta(days=1),
+                total_price      = 11000,
+                total_guest      = 1,
+                status_id        = status_id
+            )
+
+    def get_reservations(self, query=''):
+        access_token = jwt.encode({'user': 1}, SECRET_KEY, ALGORITHM)
+
+        return Client().get(f'/reservation{query}', HTTP_AUTHORIZATION=access_token)
+
+    def test_reservation_buckets(self):
+        self.create_reservations(2, 10)
+        self.create_reservations(2, -30)
+        self.create_reservations(1, 10, status_id=3)
+        self.create_reservations(1, 20, status_id=1)
+
+        results = self.get_reservations().json()['results']
+
+        self.assertEqual([row['startDate'] for row in results['upcomingReservations']], [
+            f'{date.today() + timedelta(days=10)}', f'{date.today() + timedelta(days=13)}'
+        ])
+        self.assertEqual([row['startDate'] for row in results['pastReservations']], [
+            f'{date.today() - timedelta(days=27)}', f'{date.today() - timedelta(days=30)}'
+        ])
+        self.assertEqual([row['thumbnailImage'] for row in results['upcomingReservations']], ['house1_0.jpg', 'house2_0.jpg'])
+        self.assertEqual(len(results['canceledReservations']), 1)
+
+    def test_reservation_buckets_query_count_constant(self):
+        self.create_reservations(2, 10)
+        self.get_reservations()
+        with self.assertNumQueries(3):
+            self.get_reservations()
+
+        self.create_reservations(30, -100)
+        self.create_reservations(30, 10, status_id=3)
+        with self.assertNumQueries(3):
+            self.get_reservations()
+
+    def test_reservation_bucket_pages(self):
+        self.create_reservations(5, -30)
+
+        first_page = self.get_reservations('?bucket=past&limit=3').json()
+        self.assertEqual(list(first_page['results']), ['pastReservations'])
+        self.assertEqual(len(first_page['results']['pastReservations']), 3)
+
+        second_page = self.get_reservations(f'?bucket=past&limit=3&cursor={first_page["next"]["past"]}').json()
+        self.assertEqual(
+            [row['startDate'] for row in second_page['results']['pastReservations']],
+            [f'{date.today() - timedelta(days=27)}', f'{date.today() - timedelta(days=30)}']
+        )
+        self.assertEqual(second_page['next'], {'past': None})
+
+        self.assertEqual(self.get_reservations('?bucket=later').status_code, 400)
+        self.assertEqual(self.get_reservations(f'?cursor={first_page["next"]["past"]}').status_code, 400)
+
+        for limit in ['0', '-5', 'x']:
+            response = self.get_reservations(f'?limit={limit}')
+            self.assertEqual(response.json(), {'message': 'INVALID_LIMIT'})
+
+    def test_reservation_bucket_tampered_cursor(self):
+        self.create_reservations(2, -30)
+
+        for values in [['abc', 1], [{'a': 1}, 1], [f'{date.today()}', 'abc']]:
+            cursor   = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            response = self.get_reservations(f'?bucket=past&cursor={cursor}')
+            self.assertEqual(response.json(), {'message': 'INVALID_CURSOR'})
+            self.assertEqual(response.status_code, 400)
+
+@skipUnlessDBFeature('has_select_for_update')
+class PurchaseConcurrencyTest(TransactionTestCase):
+    THREADS = 16
+
+    def setUp(self):
+        SocialPlatform.objects.create(id=1, name='kakao')
+        ReservationStatus.objects.create(code=1, name='pending')
+        ReservationStatus.objects.create(code=2, name='booked')
+        ReservationStatus.objects.create(code=3, name='canceled')
+
+        User.objects.create(
+            id                 = 1,
+            email              = 'test@gmail.com',
+            name               = 'test',
+            profile_image      = 'profile_image.jpg',
+            social_platform_id = 1
+        )
+
+        Category.objects.create(id=1, name='집 전체', description='집 전체를 사용하게 됩니다.')
+
+        for accommodation_id in range(1, self.THREADS + 1):
+            Accommodation.objects.create(
+                id                  = accommodation_id,
+                category_id         = 1,
+                user_id             = 1,
+                title               = f'test house {accommodation_id}',
+                address             = '서울특별시 강남구 테헤란로',
+                latitude            = 37.5,
+                longitude           = 127.05,
+                description         = 'description',
+                max_capacity        = 5,
+                price               = 10000,
+                cleaning_fee        = 1000,
+                number_of_bed       = 1,
+                number_of_bedroom   = 1,
+                number_of_bathroom  = 1
+            )
+
+    def purchase_in_thread(self, accommodation_id, idempotency_key=None):
+        try:
+            return post_purchase('2021-05-01', '2021-05-04', accommodation_id, 31000, idempotency_key)
+        finally:
+            connection.close()
+
+    def test_parallel_purchase_same_dates(self):
+        with ThreadPoolExecutor(self.THREADS) as executor:
+            status_codes = [response.status_code for response in executor.map(self.purchase_in_thread, [1] * self.THREADS)]
+
+        self.assertEqual(status_codes.count(200), 1)
+        self.assertEqual(status_codes.count(409), self.THREADS - 1)
+        self.assertEqual(Reservation.objects.filter(accommodation_id=1).count(), 1)
+
+    def test_parallel_purchase_same_idempotency_key(self):
+        with ThreadPoolExecutor(self.THREADS) as executor:
+            responses = list(executor.map(self.purchase_in_thread, [1] * self.THREADS, ['retry-1'] * self.THREADS))
+
+        self.assertEqual([response.status_code for response in responses], [200] * self.THREADS)
+        self.assertEqual(len({response.json()['reservationId'] for response in responses}), 1)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def timed_purchase_in_thread(self, accommodation_id):
+        started_at = time.perf_counter()
+        response   = self.purchase_in_thread(accommodation_id)
+
+        return accommodation_id, response.status_code, time.perf_counter() - started_at
+
+    def test_parallel_purchase_different_accommodations(self):
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(self.THREADS) as executor:
+            results = list(executor.map(self.timed_purchase_in_thread, range(1, self.THREADS + 1)))
+        elapsed = time.perf_counter() - started_at
+
+        timings = {accommodation_id: seconds for accommodation_id, _, seconds in results}
+
+        sys.stderr.write(f'\n{connection.vendor}: {self.THREADS} accommodations booked in {elapsed * 1000:.1f} ms, {self.THREADS / elapsed:.1f} bookings/s\n')
+        for accommodation_id, seconds in sorted(timings.items()):
+            sys.stderr.write(f'  accommodation {accommodation_id:>3}: {seconds * 1000:.1f} ms\n')
+
+        self.assertEqual([status_code for _, status_code, _ in results], [200] * self.THREADS)
+        self.assertEqual(sorted(timings), list(range(1, self.THREADS + 1)))
+        self.assertEqual(Reservation.objects.count(), self.THREADS)
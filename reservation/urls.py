@@ -1,8 +1,12 @@
 from django.urls        import path
 from reservation.views  import ReservationListView
 from reservation.views  import PurchaseView
+from reservation.views  import QuoteView
+from reservation.views  import BookingView
 
 urlpatterns = [
     path('', ReservationListView.as_view()),
-    path('/purchase', PurchaseView.as_view())
+    path('/purchase', PurchaseView.as_view()),
+    path('/quote', QuoteView.as_view()),
+    path('/bookings/<int:booking_id>', BookingView.as_view())
 ]
@@ -1,80 +1,271 @@
 import json
-from datetime           import date
+import hashlib
+from decimal                    import Decimal, InvalidOperation
+from datetime                   import date, datetime, timedelta
+from json.decoder               import JSONDecodeError
 
-from django.shortcuts   import render
-from django.http        import HttpResponse, JsonResponse
-from django.views       import View
-from django.db.models   import Q
+from django.shortcuts           import render
+from django.http                import HttpResponse, JsonResponse
+from django.views               import View
+from django.conf                import settings
+from django.db                  import transaction, IntegrityError
+from django.db.models           import Q, Case, When, Value, CharField
+from django.utils               import timezone
 
-from reservation.models import Reservation
-from user.utils         import login_decorator
+from reservation.models         import Reservation, IdempotencyKey, BookingIntent
+from reservation.booking        import book
+from accommodation.availability import STATUS_PENDING, STATUS_CANCELED
+from accommodation.pagination   import paginate_by_cursor
+from accommodation.pricing      import quote_stays, MAX_QUOTES
+from user.utils                 import login_decorator
+
+RESERVATION_PAGE_SIZE      = 10
+MAX_RESERVATION_PAGE_SIZE  = 100
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+BOOKING_ERROR_STATUS       = {
+    'PAGE_NOT_FOUND'       : 404,
+    'INVALID_GUESTS'       : 400,
+    'RESERVATION_CONFLICT' : 409
+}
+RESERVATION_BUCKETS        = {
+    'upcoming' : 'start_date',
+    'past'     : '-start_date',
+    'canceled' : '-start_date'
+}
+
+def get_user_reservations(user_id):
+    return Reservation.objects.filter(~Q(status_id=STATUS_PENDING), user_id=user_id).annotate(
+        bucket = Case(
+            When(status_id=STATUS_CANCELED, then=Value('canceled')),
+            When(start_date__gt=date.today(), then=Value('upcoming')),
+            default      = Value('past'),
+            output_field = CharField()
+        )
+    ).select_related('accommodation')
 
 class ReservationListView(View):
     @login_decorator
     def get(self, request):
+        buckets = request.GET.getlist('bucket') or list(RESERVATION_BUCKETS)
+        cursor  = request.GET.get('cursor', '')
+
+        if any(bucket not in RESERVATION_BUCKETS for bucket in buckets):
+            return JsonResponse({'message': 'INVALID_BUCKET'}, status=400)
+
+        if cursor and len(buckets) != 1:
+            return JsonResponse({'message': 'INVALID_CURSOR'}, status=400)
+
         try:
-            user            = request.user
-            reservations    = Reservation.objects.filter(~Q(status_id=1), user_id=user.id).select_related('accommodation').prefetch_related('accommodation__image_set')
-            
-            if not reservations:
-                return JsonResponse({'message': 'NO_RESERVATION'}, status=200)
+            limit = min(int(request.GET.get('limit', RESERVATION_PAGE_SIZE)), MAX_RESERVATION_PAGE_SIZE)
+        except ValueError:
+            return JsonResponse({'message': 'INVALID_LIMIT'}, status=400)
+
+        if limit < 1:
+            return JsonResponse({'message': 'INVALID_LIMIT'}, status=400)
+
+        try:
+            reservations = get_user_reservations(request.user.id)
+            results      = {}
+            next_cursors = {}
 
-            upcoming_reservations   = []
-            past_reservations       = []
-            canceled_reservations   = []
+            for bucket in buckets:
+                page, next_cursors[bucket] = paginate_by_cursor(
+                    reservations.filter(bucket=bucket), cursor, limit, RESERVATION_BUCKETS[bucket]
+                )
 
-            for reservation in reservations:
-                reservation_dict = {
-                    'thumbnailImage'           : reservation.accommodation.image_set.first().image_url,
+                results[f'{bucket}Reservations'] = [{
+                    'thumbnailImage'           : reservation.accommodation.cover_image_url,
                     'startDate'                : reservation.start_date,
                     'endDate'                  : reservation.end_date,
                     'accommodationName'        : reservation.accommodation.title,
                     'accommodationAddress'     : reservation.accommodation.address
-                }
-                if reservation.status_id == 3:
-                    canceled_reservations.append(reservation_dict)
-                elif (date.today()-reservation.start_date).days<0:
-                    upcoming_reservations.append(reservation_dict)
-                else:
-                    past_reservations.append(reservation_dict)
-
-            results = {
-                'upcomingReservations' : upcoming_reservations,
-                'pastReservations'     : past_reservations,
-                'canceledReservations' : canceled_reservations
-            }
-            
-            return JsonResponse({'message':'SUCESS','results':results}, status=200)
-        except KeyError:
-            return JsonResponse({'message':'KEY_ERROR'}, status=400)
+                } for reservation in page]
+
+            if not cursor and not any(results.values()):
+                return JsonResponse({'message': 'NO_RESERVATION'}, status=200)
+
+            return JsonResponse({'message':'SUCESS','results':results, 'next': next_cursors}, status=200)
+
+        except ValueError:
+            return JsonResponse({'message': 'INVALID_CURSOR'}, status=400)
+
+def booking_error(error, quote):
+    if error == 'INVALID_PRICE':
+        return JsonResponse({'message': error, 'totalPrice': quote}, status=400)
+
+    return JsonResponse({'message': error}, status=BOOKING_ERROR_STATUS[error])
 
-STATUS_BOOKED = 2
+def claim_idempotency_key(user, key, request_hash):
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    user         = user,
+                    key          = key,
+                    request_hash = request_hash,
+                    expires_at   = timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+                )
+        except IntegrityError:
+            expired_count, _ = IdempotencyKey.objects.filter(user=user, key=key, expires_at__lte=timezone.now()).delete()
+
+            if not expired_count:
+                return None
+
+    return None
+
+def replay_purchase(user, key, request_hash):
+    idempotency_key = IdempotencyKey.objects.filter(user=user, key=key).first()
+
+    if idempotency_key is None or idempotency_key.status_code is None:
+        return JsonResponse({'message': 'REQUEST_IN_PROGRESS'}, status=409)
+
+    if idempotency_key.request_hash != request_hash:
+        return JsonResponse({'message': 'IDEMPOTENCY_KEY_REUSED'}, status=422)
+
+    response                        = HttpResponse(idempotency_key.response_body, status=idempotency_key.status_code, content_type='application/json')
+    response['Idempotent-Replayed'] = 'true'
+
+    return response
 
 class PurchaseView(View):
     @login_decorator
     def post(self, request):
+        key = request.headers.get('Idempotency-Key')
+
+        if not key:
+            return self.purchase(request)
+
+        if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            return JsonResponse({'message': 'INVALID_IDEMPOTENCY_KEY'}, status=400)
+
+        request_hash = hashlib.sha256(request.body).hexdigest()
+
+        with transaction.atomic():
+            idempotency_key = claim_idempotency_key(request.user, key, request_hash)
+
+            if idempotency_key is None:
+                return replay_purchase(request.user, key, request_hash)
+
+            response = self.purchase(request)
+
+            idempotency_key.status_code    = response.status_code
+            idempotency_key.response_body  = response.content.decode()
+            idempotency_key.reservation_id = json.loads(response.content).get('reservationId')
+            idempotency_key.save()
+
+        return response
+
+    def purchase(self, request):
         try:
             data    = json.loads(request.body)
             user    = request.user
 
-            accommodation_id    = data['accommodation_id']
+            accommodation_id    = int(data['accommodation_id'])
             user_id             = user.id
-            start_date          = data['start_date']
-            end_date            = data['end_date']
-            total_price         = data['total_price']
-            total_guest         = data['total_guest']
-            status_id           = STATUS_BOOKED
-
-            Reservation.objects.create(
-                accommodation_id    = accommodation_id,
-                user_id             = user_id,
-                start_date          = start_date,
-                end_date            = end_date,
-                total_price         = total_price,
-                total_guest         = total_guest,
-                status_id           = status_id
-            )
-            return JsonResponse({'message': 'SUCESS'}, status=200)
+            start_date          = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+            end_date            = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+            total_price         = Decimal(str(data['total_price']))
+
+            try:
+                total_guest = int(data['total_guest'])
+            except (TypeError, ValueError):
+                return JsonResponse({'message': 'INVALID_GUESTS'}, status=400)
+
+            if start_date >= end_date:
+                return JsonResponse({'message': 'INVALID_DATE'}, status=400)
+
+            if settings.BOOKING_MODE == 'async':
+                return self.enqueue(user_id, accommodation_id, start_date, end_date, total_price, total_guest)
+
+            error, quote, reservation = book(user_id, accommodation_id, start_date, end_date, total_price, total_guest)
+
+            if error:
+                return booking_error(error, quote)
+
+            return JsonResponse({'message': 'SUCESS', 'reservationId': reservation.id}, status=200)
         
         except KeyError:
             return JsonResponse({'message': 'KEY_ERROR'}, status=400)
+
+        except JSONDecodeError:
+            return JsonResponse({'message': 'JSON_DECODE_ERROR'}, status=400)
+
+        except InvalidOperation:
+            return JsonResponse({'message': 'INVALID_PRICE'}, status=400)
+
+        except (TypeError, ValueError):
+            return JsonResponse({'message': 'INVALID_DATE'}, status=400)
+
+    def enqueue(self, user_id, accommodation_id, start_date, end_date, total_price, total_guest):
+        (quote, error), = quote_stays([(accommodation_id, start_date, end_date, total_guest)])
+
+        if not error and total_price != quote:
+            error = 'INVALID_PRICE'
+
+        if error:
+            return booking_error(error, quote)
+
+        intent = BookingIntent.objects.create(
+            user_id          = user_id,
+            accommodation_id = accommodation_id,
+            start_date       = start_date,
+            end_date         = end_date,
+            total_price      = total_price,
+            total_guest      = total_guest
+        )
+
+        return JsonResponse({'message': 'ACCEPTED', 'bookingId': intent.id, 'status': intent.status}, status=202)
+
+class BookingView(View):
+    @login_decorator
+    def get(self, request, booking_id):
+        intent = BookingIntent.objects.filter(id=booking_id, user=request.user).first()
+
+        if not intent:
+            return JsonResponse({'message': 'PAGE_NOT_FOUND'}, status=404)
+
+        return JsonResponse({
+            'message'      : 'SUCCESS',
+            'bookingId'    : intent.id,
+            'status'       : intent.status,
+            'result'       : intent.message,
+            'reservationId': intent.reservation_id
+        }, status=200)
+
+class QuoteView(View):
+    def post(self, request):
+        try:
+            data  = json.loads(request.body)
+            stays = [(
+                int(stay['accommodation_id']),
+                datetime.strptime(stay['checkin'], '%Y-%m-%d').date(),
+                datetime.strptime(stay['checkout'], '%Y-%m-%d').date(),
+                int(stay.get('guests', 1))
+            ) for stay in data['stays']]
+
+            if len(stays) > MAX_QUOTES:
+                return JsonResponse({'message': 'TOO_MANY_STAYS'}, status=400)
+
+            if any(checkin >= checkout for _, checkin, checkout, _ in stays):
+                return JsonResponse({'message': 'INVALID_DATE'}, status=400)
+
+            quotes = [{
+                'accommodationId': accommodation_id,
+                'checkin'        : checkin,
+                'checkout'       : checkout,
+                'guests'         : guests,
+                'nights'         : (checkout - checkin).days,
+                'totalPrice'     : quote,
+                'message'        : error or 'SUCCESS'
+            } for (accommodation_id, checkin, checkout, guests), (quote, error) in zip(stays, quote_stays(stays))]
+
+            return JsonResponse({'message': 'SUCCESS', 'quotes': quotes}, status=200)
+
+        except KeyError:
+            return JsonResponse({'message': 'KEY_ERROR'}, status=400)
+
+        except JSONDecodeError:
+            return JsonResponse({'message': 'JSON_DECODE_ERROR'}, status=400)
+
+        except (TypeError, ValueError):
+            return JsonResponse({'message': 'INVALID_DATE'}, status=400)
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db                   import transaction
+from django.db.models            import Count, Sum
+
+from accommodation.models        import Accommodation
+from review.models               import Review, AccommodationRatingSummary, RATE_FIELDS
+
+class Command(BaseCommand):
+    help = 'Rebuild accommodation rating summaries from the reviews table and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report drifted summaries without rewriting them')
+
+    def handle(self, *args, **options):
+        expected = {
+            row['accommodation_id']: row for row in Review.objects.values('accommodation_id').annotate(
+                review_count = Count('id'),
+                **{f'{field}_sum': Sum(field) for field in RATE_FIELDS}
+            )
+        }
+        current = {summary.accommodation_id: summary for summary in AccommodationRatingSummary.objects.all()}
+        columns = ['review_count'] + [f'{field}_sum' for field in RATE_FIELDS]
+
+        drifted = []
+        for accommodation_id in Accommodation.objects.values_list('id', flat=True):
+            row     = expected.get(accommodation_id, {})
+            summary = current.get(accommodation_id) or AccommodationRatingSummary(accommodation_id=accommodation_id)
+
+            if not (row or summary.pk):
+                continue
+
+            values  = {column: row.get(column) or 0 for column in columns}
+            if summary.pk and all(getattr(summary, column) == value for column, value in values.items()):
+                continue
+
+            for column, value in values.items():
+                setattr(summary, column, value)
+            drifted.append(summary)
+
+        self.stdout.write(f'{len(drifted)} drifted summaries')
+
+        if options['check']:
+            return
+
+        with transaction.atomic():
+            for summary in drifted:
+                summary.save()
+                summary.sync_accommodation()
+
+        self.stdout.write(self.style.SUCCESS(f'{len(drifted)} summaries rebuilt'))
@@ -0,0 +1,44 @@
+# Generated by Django 3.1.7 on 2026-10-18 15:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+RATE_FIELDS = ['clean_rate', 'accuracy_rate', 'communication_rate', 'location_rate', 'checkin_rate', 'value_rate']
+
+def build_summaries(apps, schema_editor):
+    Review                     = apps.get_model('review', 'Review')
+    AccommodationRatingSummary = apps.get_model('review', 'AccommodationRatingSummary')
+
+    rows = Review.objects.values('accommodation_id').annotate(
+        review_count = models.Count('id'),
+        **{f'{field}_sum': models.Sum(field) for field in RATE_FIELDS}
+    )
+    AccommodationRatingSummary.objects.bulk_create([AccommodationRatingSummary(**row) for row in rows])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation', '0001_initial'),
+        ('review', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccommodationRatingSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_count', models.IntegerField(default=0)),
+                ('clean_rate_sum', models.DecimalField(decimal_places=1, default=0, max_digits=12)),
+                ('accuracy_rate_sum', models.DecimalField(decimal_places=1, default=0, max_digits=12)),
+                ('communication_rate_sum', models.DecimalField(decimal_places=1, default=0, max_digits=12)),
+                ('location_rate_sum', models.DecimalField(decimal_places=1, default=0, max_digits=12)),
+                ('checkin_rate_sum', models.DecimalField(decimal_places=1, default=0, max_digits=12)),
+                ('value_rate_sum', models.DecimalField(decimal_places=1, default=0, max_digits=12)),
+                ('accommodation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rating_summary', to='accommodation.accommodation')),
+            ],
+            options={
+                'db_table': 'accommodation_rating_summaries',
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
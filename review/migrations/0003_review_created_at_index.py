@@ -0,0 +1,17 @@
+# Generated by Django 3.1.7 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('review', '0002_accommodationratingsummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['accommodation', 'created_at', 'id'], name='reviews_accommo_1a65df_idx'),
+        ),
+    ]
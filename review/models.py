@@ -1,5 +1,8 @@
-from django.db          import models
-from reservation.models import Reservation
+from statistics         import mean
+
+from django.db            import models
+from reservation.models   import Reservation
+from accommodation.models import Accommodation
 
 class Review(models.Model):
     accommodation      = models.ForeignKey('accommodation.Accommodation', on_delete=models.CASCADE)
@@ -16,3 +19,44 @@ class Review(models.Model):
 
     class Meta:
         db_table = 'reviews'
+        indexes  = [models.Index(fields=['accommodation', 'created_at', 'id'])]
+
+RATE_FIELDS = [
+    'clean_rate',
+    'accuracy_rate',
+    'communication_rate',
+    'location_rate',
+    'checkin_rate',
+    'value_rate'
+]
+
+class AccommodationRatingSummary(models.Model):
+    accommodation          = models.OneToOneField('accommodation.Accommodation', on_delete=models.CASCADE, related_name='rating_summary')
+    review_count           = models.IntegerField(default=0)
+    clean_rate_sum         = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    accuracy_rate_sum      = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    communication_rate_sum = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    location_rate_sum      = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    checkin_rate_sum       = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    value_rate_sum         = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+
+    class Meta:
+        db_table = 'accommodation_rating_summaries'
+
+    def get_averages(self):
+        if not self.review_count:
+            return [0 for field in RATE_FIELDS]
+
+        return [getattr(self, f'{field}_sum') / self.review_count for field in RATE_FIELDS]
+
+    def get_grade(self):
+        if not self.review_count:
+            return 0
+
+        return round(mean(self.get_averages()), 2)
+
+    def sync_accommodation(self):
+        Accommodation.objects.filter(id=self.accommodation_id).update(
+            rating       = self.get_grade(),
+            review_count = self.review_count
+        )
@@ -0,0 +1,41 @@
+from django.db.models         import F
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch          import receiver
+
+from .models                  import Review, AccommodationRatingSummary, RATE_FIELDS
+
+def apply_rating_delta(accommodation_id, rates, sign, create=True):
+    changes = {f'{field}_sum': F(f'{field}_sum') + sign * rates[field] for field in RATE_FIELDS}
+    changes['review_count'] = F('review_count') + sign
+
+    summaries = AccommodationRatingSummary.objects.filter(accommodation_id=accommodation_id)
+
+    if not summaries.update(**changes) and create:
+        AccommodationRatingSummary.objects.get_or_create(accommodation_id=accommodation_id)
+        summaries.update(**changes)
+
+    for summary in summaries:
+        summary.sync_accommodation()
+
+def get_rates(review):
+    return {field: getattr(review, field) for field in RATE_FIELDS}
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rates(sender, instance, **kwargs):
+    instance._previous_rates = None
+
+    if instance.pk:
+        instance._previous_rates = Review.objects.filter(pk=instance.pk).values('accommodation_id', *RATE_FIELDS).first()
+
+@receiver(post_save, sender=Review)
+def add_review_to_summary(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_rates', None)
+
+    if previous:
+        apply_rating_delta(previous['accommodation_id'], previous, -1, create=False)
+
+    apply_rating_delta(instance.accommodation_id, get_rates(instance), 1)
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_summary(sender, instance, **kwargs):
+    apply_rating_delta(instance.accommodation_id, get_rates(instance), -1, create=False)
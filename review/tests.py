@@ -1,3 +1,119 @@
-from django.test import TestCase
+from io                     import StringIO
+from decimal                import Decimal
 
-# Create your tests here.
+from django.test            import TestCase
+from django.core.management import call_command
+
+from user.models            import User, SocialPlatform
+from accommodation.models   import Category, Accommodation
+from review.models          import Review, AccommodationRatingSummary
+
+class AccommodationRatingSummaryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        SocialPlatform.objects.create(id=1, name='kakao')
+
+        User.objects.create(
+            id                 = 1,
+            email              = 'test@gmail.com',
+            name               = 'test',
+            profile_image      = 'profile_image.jpg',
+            social_platform_id = 1
+        )
+
+        Category.objects.create(
+            id          = 1,
+            name        = '집 전체',
+            description = '집 전체를 사용하게 됩니다.'
+        )
+
+        for accommodation_id in [1, 2]:
+            Accommodation.objects.create(
+                id                 = accommodation_id,
+                category_id        = 1,
+                user_id            = 1,
+                title              = f'test house {accommodation_id}',
+                address            = '서울특별시 강남구 테헤란로',
+                latitude           = 37.5,
+                longitude          = 127.05,
+                description        = 'description',
+                max_capacity       = 5,
+                price              = 10000,
+                cleaning_fee       = 1000,
+                number_of_bed      = 1,
+                number_of_bedroom  = 1,
+                number_of_bathroom = 1
+            )
+
+    def create_review(self, rate, accommodation_id=1):
+        return Review.objects.create(
+            accommodation_id   = accommodation_id,
+            user_id            = 1,
+            clean_rate         = rate,
+            communication_rate = rate,
+            checkin_rate       = rate,
+            accuracy_rate      = rate,
+            location_rate      = rate,
+            value_rate         = rate,
+            content            = 'good'
+        )
+
+    def test_summary_follows_review_create_update_delete(self):
+        review = self.create_review(5)
+        self.create_review(3)
+
+        summary = AccommodationRatingSummary.objects.get(accommodation_id=1)
+        self.assertEqual(summary.review_count, 2)
+        self.assertEqual(summary.clean_rate_sum, Decimal('8.0'))
+        self.assertEqual(summary.get_grade(), Decimal('4.00'))
+
+        review.clean_rate = 4
+        review.save()
+        summary.refresh_from_db()
+        self.assertEqual(summary.clean_rate_sum, Decimal('7.0'))
+        self.assertEqual(summary.review_count, 2)
+
+        review.delete()
+        summary.refresh_from_db()
+        self.assertEqual(summary.review_count, 1)
+        self.assertEqual(summary.clean_rate_sum, Decimal('3.0'))
+
+    def test_summary_syncs_accommodation_sort_columns(self):
+        review = self.create_review(5)
+        self.create_review(4)
+
+        self.assertEqual(
+            Accommodation.objects.filter(id=1).values_list('rating', 'review_count').get(),
+            (Decimal('4.50'), 2)
+        )
+
+        review.delete()
+        self.assertEqual(
+            Accommodation.objects.filter(id=1).values_list('rating', 'review_count').get(),
+            (Decimal('4.00'), 1)
+        )
+
+    def test_summary_follows_review_moved_to_other_accommodation(self):
+        review = self.create_review(5)
+
+        review.accommodation_id = 2
+        review.save()
+
+        self.assertEqual(AccommodationRatingSummary.objects.get(accommodation_id=1).review_count, 0)
+        self.assertEqual(AccommodationRatingSummary.objects.get(accommodation_id=2).review_count, 1)
+
+    def test_rebuild_rating_summaries_fixes_drift(self):
+        self.create_review(5)
+        AccommodationRatingSummary.objects.filter(accommodation_id=1).update(review_count=7)
+
+        out = StringIO()
+        call_command('rebuild_rating_summaries', '--check', stdout=out)
+        self.assertIn('1 drifted summaries', out.getvalue())
+        self.assertEqual(AccommodationRatingSummary.objects.get(accommodation_id=1).review_count, 7)
+
+        call_command('rebuild_rating_summaries', stdout=StringIO())
+        self.assertEqual(AccommodationRatingSummary.objects.get(accommodation_id=1).review_count, 1)
+
+        out = StringIO()
+        call_command('rebuild_rating_summaries', '--check', stdout=out)
+        self.assertIn('0 drifted summaries', out.getvalue())
@@ -0,0 +1,78 @@
+import time
+import threading
+
+from collections        import OrderedDict
+
+from django.conf        import settings
+from django.core.cache  import caches
+
+from .models            import User
+
+class UserCache:
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout     = timeout
+        self.entries     = OrderedDict()
+        self.lock        = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+
+            if entry is None:
+                return None
+
+            user, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[user_id]
+                return None
+
+            self.entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        with self.lock:
+            self.entries[user_id] = (user, time.monotonic() + self.timeout)
+            self.entries.move_to_end(user_id)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+user_cache = UserCache(settings.LOGIN_USER_CACHE_SIZE, settings.LOGIN_USER_CACHE_TTL)
+
+def get_shared_cache():
+    return caches[settings.LOGIN_USER_CACHE_ALIAS] if settings.LOGIN_USER_CACHE_ALIAS else None
+
+def get_cached_user(user_id):
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        user = shared_cache.get(f'login-user:{user_id}')
+
+    if user is None:
+        user = User.objects.get(id=user_id)
+
+        if shared_cache is not None:
+            shared_cache.set(f'login-user:{user_id}', user, settings.LOGIN_USER_CACHE_TTL)
+
+    user_cache.set(user_id, user)
+
+    return user
+
+def invalidate_cached_user(user_id):
+    user_cache.delete(user_id)
+
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        shared_cache.delete(f'login-user:{user_id}')
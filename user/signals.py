@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch          import receiver
+
+from .models                  import User
+from .cache                   import invalidate_cached_user
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_login_user(sender, instance, **kwargs):
+    invalidate_cached_user(instance.id)
@@ -1,10 +1,18 @@
 import unittest
+import jwt
 
-from django.test   import TestCase
-from django.test   import Client
-from unittest.mock import patch, MagicMock
+from datetime             import datetime, timedelta, timezone
 
-from .models       import SocialPlatform
+from django.test          import TestCase
+from django.test          import Client
+from django.test.utils    import override_settings
+from unittest.mock        import patch, MagicMock
+
+from reservation.models   import ReservationStatus
+from my_settings          import SECRET_KEY, ALGORITHM
+from .models              import User, SocialPlatform
+from .cache               import user_cache
+from .utils               import get_token_claims, get_access_token_payload, TOKEN_CLAIMS
 
 class KakaoSigninTest(TestCase):
     @classmethod
@@ -78,3 +86,84 @@ class KakaoSigninTest(TestCase):
 
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {'message': 'INVALID_SNS_TOKEN'})
+
+class LoginUserCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        SocialPlatform.objects.create(id=1, name='kakao')
+        ReservationStatus.objects.create(code=3, name='canceled')
+
+        User.objects.create(
+            id                 = 1,
+            email              = 'test@gmail.com',
+            name               = 'test',
+            profile_image      = 'profile_image.jpg',
+            social_platform_id = 1
+        )
+
+    def setUp(self):
+        user_cache.clear()
+
+    def get_reservations(self, payload):
+        access_token = jwt.encode(payload, SECRET_KEY, ALGORITHM)
+
+        return Client().get('/reservation', HTTP_AUTHORIZATION=access_token)
+
+    def test_login_user_cached_until_saved(self):
+        with self.assertNumQueries(4):
+            self.get_reservations({'user': 1})
+        with self.assertNumQueries(3):
+            self.get_reservations({'user': 1})
+
+        User.objects.filter(id=1).get().save()
+        with self.assertNumQueries(4):
+            self.get_reservations({'user': 1})
+
+    def test_login_user_cache_evicts_least_recently_used(self):
+        User.objects.create(id=2, email='test2@gmail.com', name='test2', profile_image='profile_image.jpg', social_platform_id=1)
+
+        with patch.object(user_cache, 'max_entries', 1):
+            self.get_reservations({'user': 1})
+            self.get_reservations({'user': 2})
+
+            with self.assertNumQueries(4):
+                self.get_reservations({'user': 1})
+
+    def test_login_user_deleted(self):
+        self.get_reservations({'user': 1})
+        User.objects.filter(id=1).get().delete()
+
+        self.assertEqual(self.get_reservations({'user': 1}).json(), {'message': 'INVALID_USER'})
+
+    @override_settings(LOGIN_TRUST_TOKEN_CLAIMS=True)
+    def test_login_user_from_token_claims(self):
+        user = User.objects.get(id=1)
+
+        with self.assertNumQueries(3):
+            self.assertEqual(self.get_reservations(get_access_token_payload(user)).json(), {'message': 'NO_RESERVATION'})
+        with self.assertNumQueries(4):
+            self.get_reservations({'user': 1, **get_token_claims(user)})
+
+    def test_access_token_claims_only_in_trust_mode(self):
+        user = User.objects.get(id=1)
+
+        self.assertEqual(get_access_token_payload(user), {'user': 1})
+
+        with self.settings(LOGIN_TRUST_TOKEN_CLAIMS=True):
+            self.assertEqual(set(get_access_token_payload(user)), {'user', 'exp', *TOKEN_CLAIMS})
+
+    @override_settings(LOGIN_TRUST_TOKEN_CLAIMS=True)
+    def test_login_user_token_expired(self):
+        payload = dict(get_access_token_payload(User.objects.get(id=1)), exp=datetime.now(timezone.utc) - timedelta(seconds=1))
+
+        response = self.get_reservations(payload)
+        self.assertEqual(response.json(), {'message': 'EXPIRED_TOKEN'})
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(LOGIN_USER_CACHE_ALIAS='default')
+    def test_login_user_shared_cache(self):
+        self.get_reservations({'user': 1})
+        user_cache.clear()
+
+        with self.assertNumQueries(3):
+            self.get_reservations({'user': 1})
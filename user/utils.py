@@ -1,11 +1,36 @@
 import jwt
 import json
 
+from datetime               import datetime, timedelta, timezone
+
+from django.conf            import settings
 from django.http            import JsonResponse
 from django.core.exceptions import ObjectDoesNotExist
 
 from my_settings import SECRET_KEY, ALGORITHM
 from .models     import User
+from .cache      import get_cached_user
+
+TOKEN_CLAIMS = ['email', 'name', 'profile_image', 'social_platform_id']
+
+def get_token_claims(user):
+    return {claim: getattr(user, claim) for claim in TOKEN_CLAIMS}
+
+def get_access_token_payload(user):
+    if not settings.LOGIN_TRUST_TOKEN_CLAIMS:
+        return {'user': user.id}
+
+    return {
+        'user': user.id,
+        'exp' : datetime.now(timezone.utc) + timedelta(seconds=settings.LOGIN_TOKEN_CLAIMS_TTL),
+        **get_token_claims(user)
+    }
+
+def get_login_user(payload):
+    if settings.LOGIN_TRUST_TOKEN_CLAIMS and 'exp' in payload and all(claim in payload for claim in TOKEN_CLAIMS):
+        return User(id=payload['user'], **{claim: payload[claim] for claim in TOKEN_CLAIMS})
+
+    return get_cached_user(payload['user'])
 
 def login_decorator(func):
     def wrapper(self, request, *args, **kwargs):
@@ -17,11 +42,14 @@ def login_decorator(func):
         
         try:
             payload      = jwt.decode(access_token, SECRET_KEY, ALGORITHM)
-            login_user   = User.objects.get(id=payload['user'])
+            login_user   = get_login_user(payload)
             request.user = login_user
 
             return func(self, request, *args, **kwargs)
 
+        except jwt.ExpiredSignatureError:
+            return JsonResponse({"message": "EXPIRED_TOKEN"}, status=401)
+
         except jwt.DecodeError:
             return JsonResponse({"message": "INVALID_TOKEN"}, status=401)
 
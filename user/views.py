@@ -7,6 +7,7 @@ from django.http            import JsonResponse
 
 from my_settings            import SECRET_KEY, ALGORITHM
 from .models                import User, SocialPlatform
+from .utils                 import get_access_token_payload
 
 class KakaoSigninView(View):
     def post(self, request):
@@ -32,7 +33,7 @@ class KakaoSigninView(View):
                     'profile_image' : profile_image
                 }
             )[0]
-            access_token = jwt.encode({'user': user.id}, SECRET_KEY, ALGORITHM)
+            access_token = jwt.encode(get_access_token_payload(user), SECRET_KEY, ALGORITHM)
             return JsonResponse({"message": "SUCCESS", "access_token": access_token}, status=200)
 
         except KeyError: